@@ -7,8 +7,9 @@ Alert handling and notification system:
 - Alert history
 - Alert acknowledgment
 """
+from collections import deque
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Deque
 from datetime import datetime
 from enum import Enum
 import asyncio
@@ -21,6 +22,8 @@ try:
 except ImportError:
     AIOHTTP_AVAILABLE = False
 
+MAX_ALERT_HISTORY = 500  # alerts kept in memory; oldest drop first
+
 
 class AlertSeverity(Enum):
     """Alert severity levels"""
@@ -83,11 +86,13 @@ class AlertManager:
     """
     
     def __init__(self):
-        self.alerts: List[Alert] = []
+        self.alerts: Deque[Alert] = deque(maxlen=MAX_ALERT_HISTORY)
+        self._alerts_by_id: Dict[str, Alert] = {}  # index over self.alerts
         self._alert_counter = 0
         self._webhook_url: Optional[str] = None
         self._email_config: Dict[str, str] = {}
         self._dashboard_callback: Optional[Callable] = None
+        self._dashboard_is_coro = False  # resolved once in set_dashboard_callback
         self._discord_webhook: Optional[str] = os.getenv("DISCORD_WEBHOOK_URL")
         self._telegram_bot_token: Optional[str] = os.getenv("TELEGRAM_BOT_TOKEN")
         self._telegram_chat_id: Optional[str] = os.getenv("TELEGRAM_CHAT_ID")
@@ -120,6 +125,7 @@ class AlertManager:
     def set_dashboard_callback(self, callback: Callable):
         """Set callback for dashboard notifications"""
         self._dashboard_callback = callback
+        self._dashboard_is_coro = asyncio.iscoroutinefunction(callback)
     
     async def create_alert(
         self,
@@ -157,11 +163,11 @@ class AlertManager:
             message=message
         )
         
+        if len(self.alerts) == self.alerts.maxlen:
+            # append() is about to drop the oldest alert - keep the index in sync
+            self._alerts_by_id.pop(self.alerts[0].id, None)
         self.alerts.append(alert)
-        
-        # Keep only last 500 alerts
-        if len(self.alerts) > 500:
-            self.alerts = self.alerts[-500:]
+        self._alerts_by_id[alert.id] = alert
         
         # Send notifications
         await self._send_notifications(alert)
@@ -190,7 +196,7 @@ class AlertManager:
         """Send alert to dashboard"""
         if self._dashboard_callback:
             try:
-                if asyncio.iscoroutinefunction(self._dashboard_callback):
+                if self._dashboard_is_coro:
                     await self._dashboard_callback(alert)
                 else:
                     self._dashboard_callback(alert)
@@ -224,22 +230,22 @@ class AlertManager:
     
     def acknowledge(self, alert_id: str, by: str = "system") -> bool:
         """Acknowledge an alert"""
-        for alert in self.alerts:
-            if alert.id == alert_id:
-                alert.acknowledged = True
-                alert.acknowledged_at = datetime.now().isoformat()
-                alert.acknowledged_by = by
-                return True
-        return False
+        alert = self._alerts_by_id.get(alert_id)
+        if alert is None:
+            return False
+        alert.acknowledged = True
+        alert.acknowledged_at = datetime.now().isoformat()
+        alert.acknowledged_by = by
+        return True
     
     def resolve(self, alert_id: str) -> bool:
         """Mark alert as resolved"""
-        for alert in self.alerts:
-            if alert.id == alert_id:
-                alert.resolved = True
-                alert.resolved_at = datetime.now().isoformat()
-                return True
-        return False
+        alert = self._alerts_by_id.get(alert_id)
+        if alert is None:
+            return False
+        alert.resolved = True
+        alert.resolved_at = datetime.now().isoformat()
+        return True
     
     def resolve_by_device(self, device_id: str):
         """Resolve all alerts for a device"""
@@ -261,7 +267,7 @@ class AlertManager:
         limit: int = 50
     ) -> List[Alert]:
         """Get alerts with optional filtering"""
-        result = self.alerts.copy()
+        result = list(self.alerts)
         
         if severity:
             try:
@@ -294,7 +300,8 @@ class AlertManager:
     
     def clear_resolved(self):
         """Clear all resolved alerts"""
-        self.alerts = [a for a in self.alerts if not a.resolved]
+        self.alerts = deque((a for a in self.alerts if not a.resolved), maxlen=MAX_ALERT_HISTORY)
+        self._alerts_by_id = {a.id: a for a in self.alerts}
     
     async def _send_discord(self, alert: Alert):
         """Send alert to Discord webhook"""
@@ -154,13 +154,18 @@ class ConfigBackupManager:
             size_bytes=size_bytes
         )
     
-    def get_versions(self, device_id: str) -> List[ConfigVersion]:
-        """Get all version history for a device"""
+    def get_versions(self, device_id: str, include_content: bool = True) -> List[ConfigVersion]:
+        """Get all version history for a device
+        
+        With include_content=False the config text is not read from the
+        database (config_content is ""), for listings that only need metadata.
+        """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT id, device_id, device_name, version, config_content,
+        content_column = "config_content" if include_content else "''"
+        cursor.execute(f"""
+            SELECT id, device_id, device_name, version, {content_column},
                    config_type, timestamp, description, size_bytes
             FROM config_backups
             WHERE device_id = ?
@@ -7,14 +7,28 @@ Device registry and management for office network infrastructure:
 - Health check configuration
 - Uptime history
 """
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Deque
 from datetime import datetime
 from enum import Enum
 import json
 import asyncio
+import atexit
 import os
 import sqlite3
+import threading
+from contextlib import contextmanager
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Bumped whenever any device's status changes, so status summaries can be
+# cached between changes instead of recounted on every dashboard poll
+_status_version = 0
 
 
 class DeviceType(Enum):
@@ -37,9 +51,9 @@ class DeviceStatus(Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+@dataclass(frozen=True)
 class HealthCheckResult:
-    """Result of a device health check"""
+    """Result of a device health check (immutable once created)"""
     device_id: str
     timestamp: str
     ping_ok: bool
@@ -51,17 +65,22 @@ class HealthCheckResult:
     error: Optional[str] = None
     
     def to_dict(self) -> dict:
-        return {
-            "device_id": self.device_id,
-            "timestamp": self.timestamp,
-            "ping_ok": self.ping_ok,
-            "ping_latency_ms": self.ping_latency_ms,
-            "ports_checked": self.ports_checked,
-            "ports_open": self.ports_open,
-            "ports_closed": self.ports_closed,
-            "status": self.status.value,
-            "error": self.error
-        }
+        # Results are re-serialized on every dashboard poll; build the dict once
+        cached = self.__dict__.get("_dict")
+        if cached is None:
+            cached = {
+                "device_id": self.device_id,
+                "timestamp": self.timestamp,
+                "ping_ok": self.ping_ok,
+                "ping_latency_ms": self.ping_latency_ms,
+                "ports_checked": self.ports_checked,
+                "ports_open": self.ports_open,
+                "ports_closed": self.ports_closed,
+                "status": self.status.value,
+                "error": self.error
+            }
+            object.__setattr__(self, "_dict", cached)
+        return cached
 
 
 @dataclass
@@ -82,8 +101,8 @@ class NetworkDevice:
     uptime_percent: float = 100.0
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     
-    # Health history
-    health_history: List[HealthCheckResult] = field(default_factory=list)
+    # Health history (keep last 100)
+    health_history: Deque[HealthCheckResult] = field(default_factory=lambda: deque(maxlen=100))
     
     # Remote access credentials (optional)
     connection_protocol: str = "none"  # "ssh", "telnet", or "none"
@@ -115,16 +134,17 @@ class NetworkDevice:
     
     def update_status(self, result: HealthCheckResult):
         """Update device status from health check result"""
+        global _status_version
+        if result.status != self.status:
+            _status_version += 1
         self.status = result.status
         self.last_check = result.timestamp
         
         if result.status == DeviceStatus.ONLINE:
             self.last_online = result.timestamp
         
-        # Add to history (keep last 100)
+        # Add to history; the deque drops the oldest past 100
         self.health_history.append(result)
-        if len(self.health_history) > 100:
-            self.health_history.pop(0)
         
         # Recalculate uptime
         self._calculate_uptime()
@@ -154,101 +174,141 @@ class InfrastructureManager:
     
     DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "devices.db")
     
+    # Applied once to the shared connection
+    DB_PRAGMAS = (
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -20000",
+        "PRAGMA busy_timeout = 5000",
+    )
+    
     def __init__(self):
         self.devices: Dict[str, NetworkDevice] = {}
         self._device_counter = 0
-        self._status_callbacks: List = []
+        self._status_callbacks: List[tuple] = []  # (callback, is coroutine function)
+        self._change_listeners: List = []
+        self._summary_cache: Optional[tuple] = None  # (status version, summary)
+        self._enabled_cache: Optional[tuple] = None  # enabled devices, rebuilt after changes
+        self._conn_lock = threading.Lock()
+        self._conn = self._open_connection()
+        atexit.register(self._conn.close)
         self._init_db()
         self._load_from_db()
     
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open the long-lived SQLite connection (autocommit, tuned PRAGMAs)"""
+        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(self.DB_PATH, check_same_thread=False, isolation_level=None)
+        for pragma in self.DB_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @contextmanager
     def _get_connection(self):
-        """Get SQLite connection with threading support"""
-        return sqlite3.connect(self.DB_PATH, check_same_thread=False)
+        """Borrow the shared connection, serialized across threads"""
+        with self._conn_lock:
+            yield self._conn
+    
+    @contextmanager
+    def _transaction(self):
+        """Borrow the shared connection inside a single BEGIN/COMMIT"""
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
     
     def _init_db(self):
         """Initialize SQLite database and create table if needed"""
-        os.makedirs(os.path.dirname(self.DB_PATH), exist_ok=True)
-        conn = self._get_connection()
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS devices (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                ip TEXT NOT NULL,
-                type TEXT DEFAULT 'other',
-                description TEXT DEFAULT '',
-                location TEXT DEFAULT '',
-                ports_to_monitor TEXT DEFAULT '[]',
-                check_interval_seconds INTEGER DEFAULT 60,
-                enabled INTEGER DEFAULT 1,
-                created_at TEXT,
-                connection_protocol TEXT DEFAULT 'none',
-                ssh_port INTEGER DEFAULT 22,
-                ssh_username TEXT DEFAULT '',
-                ssh_password TEXT DEFAULT ''
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS meta (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        """)
-        conn.commit()
-        conn.close()
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS devices (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    ip TEXT NOT NULL,
+                    type TEXT DEFAULT 'other',
+                    description TEXT DEFAULT '',
+                    location TEXT DEFAULT '',
+                    ports_to_monitor TEXT DEFAULT '[]',
+                    check_interval_seconds INTEGER DEFAULT 60,
+                    enabled INTEGER DEFAULT 1,
+                    created_at TEXT,
+                    connection_protocol TEXT DEFAULT 'none',
+                    ssh_port INTEGER DEFAULT 22,
+                    ssh_username TEXT DEFAULT '',
+                    ssh_password TEXT DEFAULT ''
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
     
     def _save_device_to_db(self, device: NetworkDevice):
         """Save or update a single device in the database"""
+        self._save_devices_to_db([device])
+    
+    def _save_devices_to_db(self, devices: List[NetworkDevice]):
+        """Save or update many devices in one transaction"""
         try:
-            conn = self._get_connection()
-            conn.execute("""
-                INSERT OR REPLACE INTO devices 
-                (id, name, ip, type, description, location, ports_to_monitor, 
-                 check_interval_seconds, enabled, created_at, 
-                 connection_protocol, ssh_port, ssh_username, ssh_password)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                device.id, device.name, device.ip, device.type.value,
-                device.description, device.location,
-                json.dumps(device.ports_to_monitor),
-                device.check_interval_seconds, int(device.enabled),
-                device.created_at, device.connection_protocol,
-                device.ssh_port, device.ssh_username, device.ssh_password
-            ))
-            # Save counter
-            conn.execute(
-                "INSERT OR REPLACE INTO meta (key, value) VALUES ('device_counter', ?)",
-                (str(self._device_counter),)
-            )
-            conn.commit()
-            conn.close()
+            with self._transaction() as conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO devices 
+                    (id, name, ip, type, description, location, ports_to_monitor, 
+                     check_interval_seconds, enabled, created_at, 
+                     connection_protocol, ssh_port, ssh_username, ssh_password)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (
+                        device.id, device.name, device.ip, device.type.value,
+                        device.description, device.location,
+                        json.dumps(device.ports_to_monitor),
+                        device.check_interval_seconds, int(device.enabled),
+                        device.created_at, device.connection_protocol,
+                        device.ssh_port, device.ssh_username, device.ssh_password
+                    )
+                    for device in devices
+                ])
+                # Save counter
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('device_counter', ?)",
+                    (str(self._device_counter),)
+                )
         except Exception as e:
             print(f"Warning: Could not save device to DB: {e}")
     
     def _delete_device_from_db(self, device_id: str):
         """Delete a device from the database"""
         try:
-            conn = self._get_connection()
-            conn.execute("DELETE FROM devices WHERE id = ?", (device_id,))
-            conn.commit()
-            conn.close()
+            with self._get_connection() as conn:
+                conn.execute("DELETE FROM devices WHERE id = ?", (device_id,))
         except Exception as e:
             print(f"Warning: Could not delete device from DB: {e}")
     
     def _load_from_db(self):
         """Load all devices from SQLite database"""
         try:
-            conn = self._get_connection()
-            conn.row_factory = sqlite3.Row
-            
-            # Load counter
-            cursor = conn.execute("SELECT value FROM meta WHERE key = 'device_counter'")
-            row = cursor.fetchone()
-            if row:
-                self._device_counter = int(row['value'])
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                
+                # Load counter
+                cursor.execute("SELECT value FROM meta WHERE key = 'device_counter'")
+                row = cursor.fetchone()
+                if row:
+                    self._device_counter = int(row['value'])
+                
+                # Load devices
+                cursor.execute("SELECT * FROM devices")
+                rows = cursor.fetchall()
             
-            # Load devices
-            cursor = conn.execute("SELECT * FROM devices")
-            for row in cursor.fetchall():
+            for row in rows:
                 try:
                     dev_type = DeviceType(row['type'])
                 except ValueError:
@@ -272,7 +332,6 @@ class InfrastructureManager:
                 )
                 self.devices[row['id']] = device
             
-            conn.close()
             if self.devices:
                 print(f"✓ Loaded {len(self.devices)} devices from database")
         except Exception as e:
@@ -309,6 +368,24 @@ class InfrastructureManager:
         Returns:
             Newly created NetworkDevice
         """
+        device = self._create_device(
+            name, ip, device_type, description, location, ports_to_monitor, check_interval
+        )
+        self._save_device_to_db(device)
+        self._notify_devices_changed()
+        return device
+    
+    def _create_device(
+        self,
+        name: str,
+        ip: str,
+        device_type: str,
+        description: str = "",
+        location: str = "",
+        ports_to_monitor: List[int] = None,
+        check_interval: int = 60
+    ) -> NetworkDevice:
+        """Build and register a device in memory without persisting it"""
         device_id = self._generate_id()
         
         # Parse device type
@@ -333,7 +410,6 @@ class InfrastructureManager:
         )
         
         self.devices[device_id] = device
-        self._save_device_to_db(device)
         return device
     
     def _default_ports(self, device_type: DeviceType) -> List[int]:
@@ -355,6 +431,7 @@ class InfrastructureManager:
         if device_id in self.devices:
             del self.devices[device_id]
             self._delete_device_from_db(device_id)
+            self._notify_devices_changed()
             return True
         return False
     
@@ -389,6 +466,12 @@ class InfrastructureManager:
         
         return devices
     
+    def list_enabled_devices(self) -> tuple:
+        """Enabled devices (cached until the next add/remove/update/import)"""
+        if self._enabled_cache is None:
+            self._enabled_cache = tuple(d for d in list(self.devices.values()) if d.enabled)
+        return self._enabled_cache
+    
     def update_device(self, device_id: str, **kwargs) -> Optional[NetworkDevice]:
         """Update device properties"""
         device = self.devices.get(device_id)
@@ -405,10 +488,21 @@ class InfrastructureManager:
                 setattr(device, key, value)
         
         self._save_device_to_db(device)
+        self._notify_devices_changed()
         return device
     
     def get_status_summary(self) -> Dict[str, Any]:
-        """Get overall infrastructure status summary"""
+        """Get overall infrastructure status summary (cached until a status or device changes)"""
+        cached = self._summary_cache
+        if cached is not None and cached[0] == _status_version:
+            return cached[1]
+        
+        version = _status_version
+        summary = self._build_status_summary()
+        self._summary_cache = (version, summary)
+        return summary
+    
+    def _build_status_summary(self) -> Dict[str, Any]:
         devices = list(self.devices.values())
         
         if not devices:
@@ -456,13 +550,27 @@ class InfrastructureManager:
     
     def register_status_callback(self, callback):
         """Register callback for status changes"""
-        self._status_callbacks.append(callback)
+        self._status_callbacks.append((callback, asyncio.iscoroutinefunction(callback)))
+    
+    def register_change_listener(self, callback):
+        """Register a no-arg callback fired when devices are added, removed or updated"""
+        self._change_listeners.append(callback)
+    
+    def _notify_devices_changed(self):
+        """Notify change listeners (must not block - may run on any thread)"""
+        self._summary_cache = None
+        self._enabled_cache = None
+        for callback in self._change_listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Device change listener error: {e}")
     
     async def notify_status_change(self, device: NetworkDevice, old_status: DeviceStatus):
         """Notify callbacks of status change"""
-        for callback in self._status_callbacks:
+        for callback, is_coro in self._status_callbacks:
             try:
-                if asyncio.iscoroutinefunction(callback):
+                if is_coro:
                     await callback(device, old_status)
                 else:
                     callback(device, old_status)
@@ -471,18 +579,21 @@ class InfrastructureManager:
     
     def export_config(self) -> str:
         """Export all devices as JSON"""
-        return json.dumps({
+        config = {
             "devices": [d.to_dict() for d in self.devices.values()],
             "exported_at": datetime.now().isoformat()
-        }, indent=2)
+        }
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(config, option=orjson.OPT_INDENT_2).decode()
+        return json.dumps(config, indent=2, ensure_ascii=False)
     
     def import_config(self, config_json: str) -> int:
         """Import devices from JSON config"""
         data = json.loads(config_json)
-        count = 0
+        imported = []
         
         for dev_data in data.get("devices", []):
-            self.add_device(
+            imported.append(self._create_device(
                 name=dev_data.get("name", "Unknown"),
                 ip=dev_data.get("ip", ""),
                 device_type=dev_data.get("type", "other"),
@@ -490,10 +601,14 @@ class InfrastructureManager:
                 location=dev_data.get("location", ""),
                 ports_to_monitor=dev_data.get("ports_to_monitor", []),
                 check_interval=dev_data.get("check_interval_seconds", 60)
-            )
-            count += 1
+            ))
+        
+        # One transaction (one fsync) for the whole import
+        if imported:
+            self._save_devices_to_db(imported)
+            self._notify_devices_changed()
         
-        return count
+        return len(imported)
 
 
 # Singleton instance
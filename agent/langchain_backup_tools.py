@@ -63,7 +63,7 @@ def list_config_versions(device_id: str) -> str:
         List of available versions
     """
     try:
-        versions = config_backup.get_versions(device_id)
+        versions = config_backup.get_versions(device_id, include_content=False)
         
         if not versions:
             return f"ℹ️ No backups found for device '{device_id}'."
@@ -32,7 +32,7 @@ def save_diagnostic_result(
     Returns:
         Confirmation that the result was saved
     """
-    from agent.long_term_memory import long_term_memory
+    from agent.long_term_memory import get_long_term_memory
     
     # Try to parse as JSON dict, otherwise wrap as string
     try:
@@ -40,7 +40,7 @@ def save_diagnostic_result(
     except (json.JSONDecodeError, TypeError):
         event_data = {"description": str(data)}
     
-    event_id = long_term_memory.record_event(
+    event_id = get_long_term_memory().record_event(
         device_ip=device_ip,
         event_type=event_type,
         event_data=event_data,
@@ -69,9 +69,12 @@ def query_device_history(
     Returns:
         Past events and diagnostics for the device
     """
-    from agent.long_term_memory import long_term_memory
+    from agent.long_term_memory import get_long_term_memory
     
-    history = long_term_memory.get_device_history(device_ip, event_type, limit)
+    # Event data is only displayed, so keep SQLite's JSON text as-is
+    history = get_long_term_memory().get_device_history(
+        device_ip, event_type, limit, decode_data=False
+    )
     
     if not history:
         filter_text = f" of type '{event_type}'" if event_type else ""
@@ -85,7 +88,7 @@ def query_device_history(
         lines.append(
             f"\n{severity_emoji} [{event['created_at']}] {event['event_type']}"
             f"\n  Source: {event['source']}"
-            f"\n  Data: {json.dumps(event['event_data'], indent=2)[:300]}"
+            f"\n  Data: {event['event_data'][:300]}"
         )
     
     return "\n".join(lines)
@@ -107,9 +110,9 @@ def get_network_baseline(
     Returns:
         Baseline value, thresholds, and sample count
     """
-    from agent.long_term_memory import long_term_memory
+    from agent.long_term_memory import get_long_term_memory
     
-    baseline = long_term_memory.get_baseline(device_ip, metric)
+    baseline = get_long_term_memory().get_baseline(device_ip, metric)
     
     if not baseline:
         return (
@@ -145,13 +148,12 @@ def check_anomaly_against_baseline(
     Returns:
         Whether the value is anomalous and comparison details
     """
-    from agent.long_term_memory import long_term_memory
-    
-    # Check against baseline
-    result = long_term_memory.is_anomalous(device_ip, metric, current_value)
+    from agent.long_term_memory import get_long_term_memory
     
-    # Update baseline with new measurement (learning)
-    long_term_memory.update_baseline(device_ip, metric, current_value)
+    # Check against baseline and update it with the new measurement (learning)
+    result = get_long_term_memory().is_anomalous(
+        device_ip, metric, current_value, learn=True
+    )
     
     if result["anomalous"]:
         return (
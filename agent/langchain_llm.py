@@ -8,6 +8,8 @@ Supports multiple LLM providers with automatic fallback:
 
 Inspired by OpenClaw's multi-provider architecture.
 """
+import os
+
 from langchain_ollama import ChatOllama
 from langchain_core.language_models.chat_models import BaseChatModel
 from config import config
@@ -16,6 +18,31 @@ from agent.logging_config import get_logger
 logger = get_logger("langchain_llm")
 
 
+# ============= RESPONSE CACHE =============
+
+def _enable_llm_cache():
+    """
+    Install LangChain's SQLite response cache for all chat models
+    
+    The key is the full message list plus the model/tool binding, so a
+    repeated query in a fresh thread reuses the cached tool-call plan
+    (tools still run live); later steps hit only if tool output matches.
+    """
+    try:
+        from langchain_core.globals import set_llm_cache
+        from langchain_community.cache import SQLiteCache
+        
+        os.makedirs(os.path.dirname(config.LLM_CACHE_PATH) or ".", exist_ok=True)
+        set_llm_cache(SQLiteCache(database_path=config.LLM_CACHE_PATH))
+        logger.info(f"💾 LLM response cache enabled ({config.LLM_CACHE_PATH})")
+    except Exception as e:
+        logger.warning(f"Could not enable LLM response cache: {e}")
+
+
+if config.LLM_CACHE_ENABLED:
+    _enable_llm_cache()
+
+
 # ============= PROVIDER FACTORY =============
 
 def _create_ollama_llm(model: str = None, base_url: str = None,
@@ -25,7 +52,8 @@ def _create_ollama_llm(model: str = None, base_url: str = None,
         model=model or config.OLLAMA_MODEL,
         base_url=base_url or config.OLLAMA_HOST,
         temperature=temperature,
-        timeout=timeout
+        timeout=timeout,
+        keep_alive=config.OLLAMA_KEEP_ALIVE
     )
 
 
@@ -68,10 +96,25 @@ _PROVIDER_FACTORY = {
 }
 
 
+def _resolve_provider(name: str) -> str:
+    """Registered provider name, or "ollama" (with a warning) for anything else"""
+    if name in _PROVIDER_FACTORY:
+        return name
+    logger.warning(f"Unknown provider '{name}', falling back to ollama")
+    return "ollama"
+
+
+# Configured providers are validated once here, not on every get_llm() call
+_DEFAULT_PROVIDER = _resolve_provider(config.LLM_PROVIDER)
+_FALLBACK_PROVIDER = (
+    _resolve_provider(config.LLM_FALLBACK_PROVIDER) if config.LLM_FALLBACK_ENABLED else None
+)
+
+
 def get_llm(
     provider: str = None,
     model: str = None,
-    temperature: float = 0.7,
+    temperature: float = None,
     timeout: int = 45
 ) -> BaseChatModel:
     """
@@ -80,24 +123,23 @@ def get_llm(
     Args:
         provider: LLM provider ("ollama", "openai", "deepseek"). Default: from config.
         model: Model name. Default: from provider-specific config.
-        temperature: Sampling temperature
+        temperature: Sampling temperature. Default: LLM_TEMPERATURE from config.
         timeout: Request timeout in seconds
     
     Returns:
         BaseChatModel instance
     """
-    provider = provider or config.LLM_PROVIDER
-    factory = _PROVIDER_FACTORY.get(provider)
+    provider = _resolve_provider(provider) if provider else _DEFAULT_PROVIDER
+    if temperature is None:
+        temperature = config.LLM_TEMPERATURE
     
-    if not factory:
-        logger.warning(f"Unknown provider '{provider}', falling back to ollama")
-        factory = _PROVIDER_FACTORY["ollama"]
+    llm = _PROVIDER_FACTORY[provider](model=model, temperature=temperature, timeout=timeout)
     
-    # For ollama, pass base_url; for others, don't
-    if provider == "ollama":
-        return factory(model=model, temperature=temperature, timeout=timeout)
-    else:
-        return factory(model=model, temperature=temperature, timeout=timeout)
+    # A cached sample would be replayed forever - only cache deterministic output
+    if temperature > 0:
+        llm.cache = False
+    
+    return llm
 
 
 # ============= FALLBACK LLM WRAPPER =============
@@ -172,7 +214,7 @@ class FallbackLLM:
 
 def get_llm_with_fallback(
     model: str = None,
-    temperature: float = 0.7,
+    temperature: float = None,
     timeout: int = 45
 ) -> BaseChatModel:
     """
@@ -183,7 +225,7 @@ def get_llm_with_fallback(
     
     Args:
         model: Optional model override for primary provider
-        temperature: Sampling temperature
+        temperature: Sampling temperature. Default: LLM_TEMPERATURE from config.
         timeout: Request timeout
     
     Returns:
@@ -191,22 +233,22 @@ def get_llm_with_fallback(
     """
     primary = get_llm(model=model, temperature=temperature, timeout=timeout)
     
-    if (config.LLM_FALLBACK_ENABLED and 
-        config.LLM_FALLBACK_PROVIDER != config.LLM_PROVIDER):
+    # Compared after resolution: an unknown name that also maps to ollama is no fallback
+    if _FALLBACK_PROVIDER and _FALLBACK_PROVIDER != _DEFAULT_PROVIDER:
         try:
             fallback = get_llm(
-                provider=config.LLM_FALLBACK_PROVIDER,
+                provider=_FALLBACK_PROVIDER,
                 temperature=temperature,
                 timeout=timeout
             )
             logger.info(
-                f"🔄 Multi-LLM: primary={config.LLM_PROVIDER}, "
-                f"fallback={config.LLM_FALLBACK_PROVIDER}"
+                f"🔄 Multi-LLM: primary={_DEFAULT_PROVIDER}, "
+                f"fallback={_FALLBACK_PROVIDER}"
             )
             return FallbackLLM(
                 primary, fallback,
-                primary_name=config.LLM_PROVIDER,
-                fallback_name=config.LLM_FALLBACK_PROVIDER
+                primary_name=_DEFAULT_PROVIDER,
+                fallback_name=_FALLBACK_PROVIDER
             )
         except Exception as e:
             logger.warning(f"Failed to create fallback LLM: {e}. Using primary only.")
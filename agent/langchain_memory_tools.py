@@ -6,7 +6,7 @@ Tools for interacting with the agent's long-term memory.
 from typing import Optional
 from langchain_core.tools import tool
 
-from agent.long_term_memory import long_term_memory
+from agent.long_term_memory import get_long_term_memory
 
 
 @tool
@@ -27,7 +27,7 @@ def remember_solution(
         Confirmation of saved solution
     """
     try:
-        saved = long_term_memory.save_solution(
+        saved = get_long_term_memory().save_solution(
             problem=problem,
             solution=solution,
             category=category
@@ -60,18 +60,22 @@ def recall_similar_solutions(
         List of similar past solutions
     """
     try:
-        # Extract keywords for search
-        keywords = " OR ".join(problem.split()[:5])
+        # Extract keywords for search, quoted so punctuation (IPs, "can't",
+        # interface names) is matched literally instead of as FTS syntax
+        keywords = " OR ".join(
+            '"{}"'.format(word.replace('"', '')) for word in problem.split()[:5]
+        )
         
-        solutions = long_term_memory.find_similar_solutions(
+        solutions = get_long_term_memory().find_similar_solutions(
             query=keywords,
             category=category,
-            limit=5
+            limit=5,
+            semantic_query=problem
         )
         
         if not solutions:
             # Try top solutions as fallback
-            solutions = long_term_memory.get_top_solutions(
+            solutions = get_long_term_memory().get_top_solutions(
                 category=category,
                 limit=3
             )
@@ -106,7 +110,7 @@ def get_user_preference(key: str) -> str:
         Preference value or default message
     """
     try:
-        value = long_term_memory.get_preference(key)
+        value = get_long_term_memory().get_preference(key)
         
         if value:
             return f"**{key}:** {value}"
@@ -129,7 +133,7 @@ def set_user_preference(key: str, value: str) -> str:
         Confirmation
     """
     try:
-        long_term_memory.set_preference(key, value)
+        get_long_term_memory().set_preference(key, value)
         return f"✅ Preference saved: **{key}** = {value}"
     except Exception as e:
         return f"❌ Error saving preference: {str(e)}"
@@ -144,7 +148,7 @@ def get_all_preferences() -> str:
         List of all preferences
     """
     try:
-        prefs = long_term_memory.get_all_preferences()
+        prefs = get_long_term_memory().get_all_preferences()
         
         if not prefs:
             return "ℹ️ No preferences saved yet."
@@ -170,7 +174,7 @@ def get_top_solutions(category: str = None) -> str:
         List of top solutions
     """
     try:
-        solutions = long_term_memory.get_top_solutions(category=category, limit=10)
+        solutions = get_long_term_memory().get_top_solutions(category=category, limit=10)
         
         if not solutions:
             return "ℹ️ No solutions stored in memory yet."
@@ -196,7 +200,7 @@ def get_memory_stats() -> str:
         Memory statistics
     """
     try:
-        stats = long_term_memory.get_memory_stats()
+        stats = get_long_term_memory().get_memory_stats()
         
         return f"""## Agent Memory Statistics
 
@@ -224,7 +228,7 @@ def learn_pattern(pattern_type: str, description: str) -> str:
         Confirmation
     """
     try:
-        long_term_memory.record_pattern(
+        get_long_term_memory().record_pattern(
             pattern_type=pattern_type,
             pattern_data={"description": description}
         )
@@ -73,12 +73,9 @@ def record_remediation_result(
         "timestamp": datetime.now().isoformat(),
     }
     
+    # Bounded deque: keeps the last 100 records
     log_watcher._remediation_history.append(record)
     
-    # Keep max 100 records
-    if len(log_watcher._remediation_history) > 100:
-        log_watcher._remediation_history = log_watcher._remediation_history[-100:]
-    
     status = "✅ Berhasil" if success else "❌ Gagal"
     return f"Remediation recorded: {status} — {action_taken} on {device_ip}"
 
@@ -97,7 +94,7 @@ def get_remediation_history(device_ip: Optional[str] = None, limit: int = 10) ->
     """
     from agent.log_watcher import log_watcher
     
-    history = log_watcher._remediation_history.copy()
+    history = list(log_watcher._remediation_history)
     
     if device_ip:
         history = [h for h in history if h.get("device_ip") == device_ip]
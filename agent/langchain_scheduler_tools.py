@@ -48,7 +48,7 @@ To enable monitoring:
 2. Start the monitoring scheduler
 
 Current monitoring status: {"Running" if scheduler.is_running else "Stopped"}
-Registered devices: {len(list(scheduler._check_results.keys()))} with results"""
+Registered devices: {len(scheduler.get_all_results())} with results"""
         
         elif task_type == "ping":
             host = target_host or "8.8.8.8"
@@ -19,48 +19,12 @@ def discover_network() -> str:
     Returns:
         List of discovered devices
     """
-    import subprocess
-    import re
-    from datetime import datetime
-    from agent.network_topology import network_topology, NetworkNode
-    
     try:
         # Detect local network info
         network_topology._detect_local_network()
         
         # Synchronous ARP scan
-        result = subprocess.run(
-            ['arp', '-a'],
-            capture_output=True, text=True, timeout=10
-        )
-        
-        nodes = []
-        for line in result.stdout.split('\n'):
-            ip_match = re.search(r'(\d+\.\d+\.\d+\.\d+)', line)
-            mac_match = re.search(r'([0-9a-fA-F]{2}[:-]){5}[0-9a-fA-F]{2}', line)
-            
-            if ip_match:
-                ip = ip_match.group(1)
-                mac = mac_match.group(0) if mac_match else None
-                
-                if ip.endswith('.255') or ip == '255.255.255.255':
-                    continue
-                
-                node_id = f"node_{ip.replace('.', '_')}"
-                node = NetworkNode(
-                    id=node_id,
-                    ip=ip,
-                    mac=mac,
-                    is_gateway=(ip == network_topology._gateway_ip),
-                    last_seen=datetime.now().isoformat()
-                )
-                
-                if mac:
-                    node.vendor = network_topology._get_vendor_from_mac(mac)
-                node.node_type = network_topology._guess_node_type(node)
-                
-                nodes.append(node)
-                network_topology.nodes[node_id] = node
+        nodes = network_topology._discover_arp_nodes()
         
         network_topology.build_links()
         
@@ -94,19 +58,16 @@ def scan_network(start_ip: int = 1, end_ip: int = 50) -> str:
     This takes longer but finds more devices.
     
     Args:
-        start_ip: Start of IP range to scan (last octet, default: 1)
-        end_ip: End of IP range to scan (last octet, default: 50)
+        start_ip: First host to scan, counted from the start of the local
+                  network (the last octet on a /24, default: 1)
+        end_ip: Last host to scan, same numbering (default: 50)
     
     Returns:
         List of discovered devices
     """
     try:
         async def _scan():
-            network_topology._detect_local_network()
-            nodes = await network_topology.ping_sweep(
-                start=start_ip, 
-                end=min(end_ip, 254)
-            )
+            nodes = await network_topology.ping_sweep(start=start_ip, end=end_ip)
             network_topology.build_links()
             return nodes
         
@@ -114,19 +75,24 @@ def scan_network(start_ip: int = 1, end_ip: int = 50) -> str:
         if end_ip - start_ip > 100:
             return "⚠️ Range too large. Please scan max 100 IPs at a time."
         
+        addresses = network_topology.sweep_addresses(start=start_ip, end=end_ip)
+        if not addresses:
+            return "⚠️ No hosts in that range on the local network."
+        scan_range = f"{addresses[0]} - {addresses[-1]}"
+        
         loop = asyncio.get_event_loop()
         if loop.is_running():
             asyncio.create_task(_scan())
             return f"""🔍 Ping Sweep Started
 
-**Scanning Range:** {network_topology._subnet}.{start_ip} - {network_topology._subnet}.{end_ip}
+**Scanning Range:** {scan_range}
 
 This may take 30-60 seconds. Run `get topology` to see results."""
         else:
             nodes = asyncio.run(_scan())
             
             output = f"## Ping Sweep Complete\n\n"
-            output += f"**Range:** .{start_ip} - .{end_ip}\n"
+            output += f"**Range:** {scan_range}\n"
             output += f"**Found:** {len(nodes)} responding hosts\n\n"
             
             for node in nodes:
@@ -242,8 +208,10 @@ def export_topology_json() -> str:
         
         output = "## Topology Export\n\n"
         output += "```json\n"
-        output += json.dumps(data, indent=2)[:2000]
-        if len(json.dumps(data)) > 2000:
+        # Serialize once; the length check reuses the same text
+        text = json.dumps(data, indent=2)
+        output += text[:2000]
+        if len(text) > 2000:
             output += "\n... (truncated)"
         output += "\n```"
         
@@ -17,7 +17,7 @@ from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.checkpoint.memory import MemorySaver
 
-from agent.langchain_llm import get_llm_with_fallback, FallbackLLM
+from agent.langchain_llm import get_llm, get_llm_with_fallback, FallbackLLM
 from agent.langchain_tools import get_all_tools
 from agent.logging_config import get_logger
 from config import config
@@ -145,9 +145,16 @@ BURUK: User bertanya "apakah server 192.168.1.10 hidup?"
 BURUK: User bertanya "berapa bandwidth saat ini?"
 → Menjawab dengan angka karangan. SELALU panggil `get_bandwidth_stats` dulu.
 
+### Pemanggilan Paralel
+
+Tool yang TIDAK saling bergantung harus dipanggil BERSAMAAN dalam satu giliran — semuanya dijalankan paralel.
+Tunggu hasil hanya jika input tool berikutnya bergantung pada output tool sebelumnya.
+- BAIK: `ping` + `get_network_info` + `dns_lookup` dalam satu giliran
+- BURUK: `ping`, tunggu hasil, lalu `get_network_info`, tunggu hasil, lalu `dns_lookup`
+
 ### Strategi Troubleshooting
 
-Saat user melaporkan masalah jaringan, lakukan investigasi bertahap:
+Saat user melaporkan masalah jaringan, lakukan investigasi bertahap (per tahap, panggil semua tool-nya sekaligus):
 1. Mulai dari diagnostik dasar (`ping`, `get_network_info`)
 2. Jika ping gagal → `traceroute` untuk identifikasi titik putus
 3. Jika DNS suspect → `dns_lookup` atau `nslookup`
@@ -442,6 +449,9 @@ class NetworkAgent:
                 chunk = event["data"].get("chunk")
                 if chunk and hasattr(chunk, "content") and chunk.content:
                     yield chunk.content
+            elif event["event"] == "on_tool_start":
+                # Announce each step as soon as the model commits to it
+                yield f"\n🔧 Menjalankan {event['name']}...\n"
             elif event["event"] == "on_tool_end":
                 # Optionally yield tool results
                 output = event["data"].get("output", "")
@@ -498,6 +508,29 @@ network_agent = NetworkAgent(use_memory=True, persistent=True)
 
 # ============= CONVENIENCE FUNCTIONS =============
 
+async def warm_up_prompt_cache():
+    """
+    Prime Ollama's prompt cache with the static system prompt + tool schemas
+    
+    Every agent request starts with this same prefix, so later requests only
+    prefill their dynamic tail. No-op for non-Ollama providers.
+    """
+    if config.LLM_PROVIDER != "ollama":
+        return
+    
+    try:
+        llm = get_llm(provider="ollama")
+        llm.num_predict = 1  # only the prefill matters
+        llm.cache = False  # must reach the server even when responses are cached
+        await llm.bind_tools(get_all_tools()).ainvoke([
+            SystemMessage(content=SYSTEM_PROMPT),
+            HumanMessage(content="ping")
+        ])
+        logger.info("🔥 Ollama prompt cache warmed with system prompt")
+    except Exception as e:
+        logger.warning(f"Prompt cache warm-up failed: {e}")
+
+
 async def process_query(query: str, thread_id: str = None) -> str:
     """Process a query using the default agent"""
     return await network_agent.ainvoke(query, thread_id)
@@ -8,9 +8,11 @@ creates alerts, and triggers the agent to investigate AND remediate.
 Inspired by OpenClaw's autonomous workflow execution pattern.
 """
 import asyncio
+import heapq
 import re
 import time
-from typing import Dict, List, Optional, Callable
+from collections import deque
+from typing import Dict, List, Optional, Callable, Deque, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
@@ -184,6 +186,39 @@ REMEDIATION_RUNBOOKS = {
 }
 
 
+def _remediation_prefix(runbook: dict) -> str:
+    """Static part of a remediation prompt (everything except the anomaly details)"""
+    prefix = (
+        f"[AUTO-REMEDIATION] Anomali terdeteksi, ikuti runbook berikut.\n\n"
+        f"=== RUNBOOK REMEDIASI ===\n"
+        f"{runbook['prompt']}\n\n"
+        f"Instruksi tambahan:\n"
+        f"- Gunakan tools berikut untuk investigasi awal: {', '.join(runbook['auto_actions'])}\n"
+    )
+    if runbook['requires_confirmation']:
+        prefix += (
+            f"- Aksi yang MEMERLUKAN konfirmasi user: {', '.join(runbook['requires_confirmation'])}\n"
+            f"- JANGAN skip konfirmasi untuk aksi high-risk\n"
+        )
+    prefix += (
+        f"\nSetelah investigasi dan remediasi, simpan hasilnya ke memory "
+        f"dengan save_diagnostic_result jika tool tersedia.\n\n"
+    )
+    return prefix
+
+
+# Prompt prefixes built once, so every trigger sends a byte-identical
+# (prompt-cacheable) prefix and only the anomaly details are formatted per call
+_REMEDIATION_PREFIXES = {
+    name: _remediation_prefix(runbook) for name, runbook in REMEDIATION_RUNBOOKS.items()
+}
+_INVESTIGATION_PREFIX = (
+    "[AUTO-MONITOR] Anomali terdeteksi. "
+    "Lakukan investigasi singkat: cek status device (ping), cek interface, "
+    "dan berikan analisis penyebab serta rekomendasi.\n\n"
+)
+
+
 @dataclass
 class DetectedAnomaly:
     """An anomaly detected in device logs"""
@@ -224,6 +259,24 @@ class DeviceWatchConfig:
     last_log_lines: List[str] = field(default_factory=list)
 
 
+_BACKREF_RE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+def _build_prefilter(patterns: List[AnomalyPattern]) -> Optional[re.Pattern]:
+    """
+    Combine all patterns into one alternation that matches iff any does
+    
+    Returns None when the patterns can't be merged safely (backreferences
+    would renumber, or inline flags are rejected mid-pattern).
+    """
+    if any(_BACKREF_RE.search(p.pattern) for p in patterns):
+        return None
+    try:
+        return re.compile("|".join(f"(?:{p.pattern})" for p in patterns), re.IGNORECASE)
+    except re.error:
+        return None
+
+
 # ============= LOG WATCHER SERVICE =============
 
 class LogWatcher:
@@ -242,10 +295,15 @@ class LogWatcher:
         self._running = False
         self._task: Optional[asyncio.Task] = None
         self._devices: Dict[str, DeviceWatchConfig] = {}
+        # Min-heap of (due_time, ip) so the loop only touches devices that are due
+        self._due: List[Tuple[float, str]] = []
+        self._next_due: Dict[str, float] = {}  # live due time per device; other heap entries are stale
         self._patterns: List[AnomalyPattern] = list(DEFAULT_PATTERNS)
-        self._anomalies: List[DetectedAnomaly] = []
-        self._investigations: List[dict] = []  # auto-triggered agent investigations
-        self._remediation_history: List[dict] = []  # remediation action history
+        self._prefilter: Optional[re.Pattern] = _build_prefilter(self._patterns)
+        # Bounded histories: appends past maxlen drop the oldest entry
+        self._anomalies: Deque[DetectedAnomaly] = deque(maxlen=200)
+        self._investigations: Deque[dict] = deque(maxlen=50)  # auto-triggered agent investigations
+        self._remediation_history: Deque[dict] = deque(maxlen=100)  # remediation action history
         self._anomaly_counter = 0
         self._default_interval = 60
         self._auto_trigger = True
@@ -277,10 +335,21 @@ class LogWatcher:
                 interval_seconds=interval or self._default_interval,
                 auto_trigger_agent=auto_trigger if auto_trigger is not None else self._auto_trigger
             )
+        self._schedule(device_ip, self._devices[device_ip])
+    
+    def _schedule(self, device_ip: str, config: DeviceWatchConfig):
+        """Queue a device at its next due time (earlier times supersede the queued one)"""
+        due = config.last_check + config.interval_seconds
+        current = self._next_due.get(device_ip)
+        if current is not None and current <= due:
+            return
+        self._next_due[device_ip] = due
+        heapq.heappush(self._due, (due, device_ip))
     
     def remove_device(self, device_ip: str):
         """Remove a device from log watching"""
         self._devices.pop(device_ip, None)
+        self._next_due.pop(device_ip, None)
     
     def add_pattern(self, name: str, pattern: str, severity: str = "warning", description: str = ""):
         """Add a custom anomaly pattern"""
@@ -290,6 +359,7 @@ class LogWatcher:
             severity=severity,
             description=description or f"Custom pattern: {name}"
         ))
+        self._prefilter = _build_prefilter(self._patterns)
     
     async def start(self, device_ips: List[str] = None):
         """Start the log watcher.
@@ -333,16 +403,24 @@ class LogWatcher:
         while self._running:
             now = time.time()
             
-            for ip, config in list(self._devices.items()):
-                if not config.enabled:
-                    continue
+            while self._due and self._due[0][0] <= now:
+                due, ip = heapq.heappop(self._due)
+                if self._next_due.get(ip) != due:
+                    continue  # superseded by an earlier entry or removed
+                del self._next_due[ip]
+                config = self._devices.get(ip)
+                if config is None or not config.enabled:
+                    continue  # removed/disabled; add_device re-queues it
                 
+                # Interval may have changed since this entry was queued
                 if now - config.last_check >= config.interval_seconds:
                     asyncio.create_task(self._check_device_logs(ip, config))
                     config.last_check = now
+                self._schedule(ip, config)
             
-            # Sleep before next iteration
-            await asyncio.sleep(5)
+            # Sleep until the next device is due (re-check at least every 5s)
+            delay = self._due[0][0] - now if self._due else 5
+            await asyncio.sleep(min(max(delay, 0), 5))
     
     async def _check_device_logs(self, device_ip: str, config: DeviceWatchConfig):
         """Fetch and analyze logs from a single device"""
@@ -394,6 +472,11 @@ class LogWatcher:
         line: str, config: DeviceWatchConfig
     ):
         """Check a single log line against all anomaly patterns"""
+        # Most lines are benign: one scan of the combined pattern rules
+        # them out before trying each pattern in priority order
+        if self._prefilter is not None and not self._prefilter.search(line):
+            return
+        
         for pattern in self._patterns:
             if pattern.compiled.search(line):
                 anomaly = await self._create_anomaly(
@@ -430,10 +513,6 @@ class LogWatcher:
         
         self._anomalies.append(anomaly)
         
-        # Keep only last 200 anomalies
-        if len(self._anomalies) > 200:
-            self._anomalies = self._anomalies[-200:]
-        
         logger.warning(
             f"🚨 Anomaly [{pattern.severity}] on {device_name} ({device_ip}): "
             f"{pattern.description} — {log_line.strip()[:100]}"
@@ -470,38 +549,23 @@ class LogWatcher:
             device_config.auto_remediate
         )
         
+        # Static per-pattern instructions go first and the per-anomaly
+        # details last, so repeated triggers share a cacheable prompt prefix.
+        details = (
+            f"=== ANOMALI ===\n"
+            f"Device: {anomaly.device_name} ({anomaly.device_ip})\n"
+            f"Severity: {anomaly.severity}\n"
+            f"Tipe: {anomaly.description}\n"
+            f"Log: {anomaly.log_line}"
+        )
         if use_remediation:
             # Build remediation-aware prompt
-            message = (
-                f"[AUTO-REMEDIATION] Anomali terdeteksi pada device {anomaly.device_name} ({anomaly.device_ip}).\n"
-                f"Severity: {anomaly.severity}\n"
-                f"Tipe: {anomaly.description}\n"
-                f"Log: {anomaly.log_line}\n\n"
-                f"=== RUNBOOK REMEDIASI ===\n"
-                f"{runbook['prompt']}\n\n"
-                f"Instruksi tambahan:\n"
-                f"- Gunakan tools berikut untuk investigasi awal: {', '.join(runbook['auto_actions'])}\n"
-            )
-            if runbook['requires_confirmation']:
-                message += (
-                    f"- Aksi yang MEMERLUKAN konfirmasi user: {', '.join(runbook['requires_confirmation'])}\n"
-                    f"- JANGAN skip konfirmasi untuk aksi high-risk\n"
-                )
-            message += (
-                f"\nSetelah investigasi dan remediasi, simpan hasilnya ke memory "
-                f"dengan save_diagnostic_result jika tool tersedia."
-            )
+            prefix = _REMEDIATION_PREFIXES.get(anomaly.pattern_name) or _remediation_prefix(runbook)
+            message = prefix + details
             mode = "remediation"
         else:
             # Investigation-only prompt (original behavior)
-            message = (
-                f"[AUTO-MONITOR] Anomali terdeteksi pada device {anomaly.device_name} ({anomaly.device_ip}).\n"
-                f"Severity: {anomaly.severity}\n"
-                f"Tipe: {anomaly.description}\n"
-                f"Log: {anomaly.log_line}\n\n"
-                f"Lakukan investigasi singkat: cek status device (ping), cek interface, "
-                f"dan berikan analisis penyebab serta rekomendasi."
-            )
+            message = _INVESTIGATION_PREFIX + details
             mode = "investigation"
         
         thread_id = f"logwatch-{int(time.time())}-{anomaly.id}"
@@ -539,13 +603,6 @@ class LogWatcher:
                     "agent_response": response[:500],  # truncate for storage
                     "timestamp": anomaly.timestamp,
                 })
-                # Keep max 100 remediation records
-                if len(self._remediation_history) > 100:
-                    self._remediation_history = self._remediation_history[-100:]
-            
-            # Keep max 50 investigations
-            if len(self._investigations) > 50:
-                self._investigations = self._investigations[-50:]
             
             logger.info(
                 f"🤖 Agent {mode} for anomaly {anomaly.id} in thread {thread_id}"
@@ -580,7 +637,7 @@ class LogWatcher:
     
     def get_anomalies(self, device_ip: str = None, severity: str = None, limit: int = 20) -> List[dict]:
         """Get recent anomalies with optional filtering"""
-        results = self._anomalies.copy()
+        results = list(self._anomalies)
         
         if device_ip:
             results = [a for a in results if a.device_ip == device_ip]
@@ -12,11 +12,314 @@ Inspired by OpenClaw's persistent and adaptive memory system.
 """
 import os
 import json
-import sqlite3
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+import functools
+import hashlib
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Optional, Dict, Any
 from dataclasses import dataclass, field
 
+# Prefer the newer bundled SQLite from pysqlite3-binary (faster JSON/FTS5)
+try:
+    import pysqlite3 as sqlite3
+except ImportError:
+    import sqlite3
+
+try:
+    import sqlite_vec
+    SQLITE_VEC_AVAILABLE = True
+except ImportError:
+    SQLITE_VEC_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize to a JSON string (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj)
+
+
+def _loads(data: Optional[str]) -> Any:
+    """Deserialize a JSON string (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _pattern_hash(pattern_data: Any) -> str:
+    """Stable digest of a pattern's canonical JSON (sorted keys, stdlib encoder)"""
+    canonical = json.dumps(pattern_data, sort_keys=True, separators=(",", ":"),
+                           ensure_ascii=False, default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def _row_to_pattern(row: tuple) -> Dict[str, Any]:
+    return {
+        "type": row[0],
+        "data": _loads(row[1]),
+        "frequency": row[2],
+        "last_seen": row[3]
+    }
+
+
+def _row_to_event(r: tuple) -> Dict[str, Any]:
+    return {
+        "id": r[0], "device_ip": r[1], "event_type": r[2],
+        "event_data": _loads(r[3]) if r[3] else {},
+        "severity": r[4], "source": r[5], "created_at": r[6]
+    }
+
+
+def _row_to_raw_event(r: tuple) -> Dict[str, Any]:
+    return {
+        "id": r[0], "device_ip": r[1], "event_type": r[2],
+        "event_data": r[3] or "{}",
+        "severity": r[4], "source": r[5], "created_at": r[6]
+    }
+
+
+def _row_to_baseline(r: tuple) -> Dict[str, Any]:
+    return {
+        "device_ip": r[0], "metric_type": r[1],
+        "baseline_value": r[2], "threshold_low": r[3],
+        "threshold_high": r[4], "sample_count": r[5],
+        "updated_at": r[6]
+    }
+
+
+# ============= SQL Statements =============
+# Kept as module constants so every call passes the identical string and
+# hits the per-connection prepared statement cache.
+
+_SQL_UPSERT_SOLUTION = """
+    INSERT INTO solutions (problem, solution, category, success_count,
+                           last_used, created_at, metadata)
+    VALUES (?, ?, ?, 1, ?, ?, ?)
+    ON CONFLICT(problem, category) DO UPDATE SET
+        solution = excluded.solution,
+        success_count = success_count + 1,
+        last_used = excluded.last_used,
+        metadata = excluded.metadata
+    RETURNING id, success_count, created_at
+"""
+
+_SQL_SEARCH_SOLUTIONS = """
+    SELECT s.id, s.problem, s.solution, s.category,
+           s.success_count, s.last_used, s.created_at, s.metadata,
+           bm25(solutions_fts)
+    FROM solutions s
+    JOIN solutions_fts fts ON s.id = fts.rowid
+    WHERE solutions_fts MATCH ?
+    ORDER BY bm25(solutions_fts), s.success_count DESC
+    LIMIT ?
+"""
+
+_SQL_SEARCH_SOLUTIONS_BY_CATEGORY = """
+    SELECT s.id, s.problem, s.solution, s.category,
+           s.success_count, s.last_used, s.created_at, s.metadata,
+           bm25(solutions_fts)
+    FROM solutions s
+    JOIN solutions_fts fts ON s.id = fts.rowid
+    WHERE solutions_fts MATCH ? AND s.category = ?
+    ORDER BY bm25(solutions_fts), s.success_count DESC
+    LIMIT ?
+"""
+
+# Cosine similarity through sqlite-vec's scalar function; rows embedded by a
+# model with a different vector size are skipped (sqlite-vec rejects them)
+_SQL_SEMANTIC_SOLUTIONS = """
+    SELECT id, 1 - vec_distance_cosine(embedding, ?) AS similarity
+    FROM solutions
+    WHERE embedding IS NOT NULL AND length(embedding) = length(?)
+    ORDER BY similarity DESC
+    LIMIT ?
+"""
+
+_SQL_SEMANTIC_SOLUTIONS_BY_CATEGORY = """
+    SELECT id, 1 - vec_distance_cosine(embedding, ?) AS similarity
+    FROM solutions
+    WHERE embedding IS NOT NULL AND length(embedding) = length(?) AND category = ?
+    ORDER BY similarity DESC
+    LIMIT ?
+"""
+
+_SQL_SOLUTIONS_BY_IDS = """
+    SELECT id, problem, solution, category, success_count,
+           last_used, created_at, metadata
+    FROM solutions
+    WHERE id IN (SELECT value FROM json_each(?))
+"""
+
+_SQL_SET_SOLUTION_EMBEDDING = "UPDATE solutions SET embedding = ? WHERE id = ?"
+
+_SQL_SOLUTION_EMBEDDINGS = """
+    SELECT id, category, embedding FROM solutions WHERE embedding IS NOT NULL
+"""
+
+_SQL_TOP_SOLUTIONS = """
+    SELECT id, problem, solution, category, success_count,
+           last_used, created_at, metadata
+    FROM solutions
+    ORDER BY success_count DESC
+    LIMIT ?
+"""
+
+_SQL_TOP_SOLUTIONS_BY_CATEGORY = """
+    SELECT id, problem, solution, category, success_count,
+           last_used, created_at, metadata
+    FROM solutions
+    WHERE category = ?
+    ORDER BY success_count DESC
+    LIMIT ?
+"""
+
+_SQL_MARK_SOLUTION_USED = """
+    UPDATE solutions
+    SET success_count = success_count + 1, last_used = ?
+    WHERE id = ?
+"""
+
+_SQL_SET_PREFERENCE = """
+    INSERT OR REPLACE INTO preferences (key, value, updated_at)
+    VALUES (?, ?, ?)
+"""
+
+_SQL_GET_PREFERENCE = "SELECT value FROM preferences WHERE key = ?"
+
+_SQL_ALL_PREFERENCES = "SELECT key, value FROM preferences"
+
+_SQL_UPSERT_PATTERN = """
+    INSERT INTO patterns (pattern_type, pattern_data, pattern_hash, frequency,
+                          last_seen, created_at)
+    VALUES (?, ?, ?, 1, ?, ?)
+    ON CONFLICT(pattern_type, pattern_hash) DO UPDATE SET
+        frequency = frequency + 1,
+        last_seen = excluded.last_seen
+"""
+
+_SQL_COMMON_PATTERNS = """
+    SELECT pattern_type, pattern_data, frequency, last_seen
+    FROM patterns
+    ORDER BY frequency DESC
+    LIMIT ?
+"""
+
+_SQL_COMMON_PATTERNS_BY_TYPE = """
+    SELECT pattern_type, pattern_data, frequency, last_seen
+    FROM patterns
+    WHERE pattern_type = ?
+    ORDER BY frequency DESC
+    LIMIT ?
+"""
+
+_SQL_INSERT_EVENT = """
+    INSERT INTO network_events (device_ip, event_type, event_data, severity, source, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_PURGE_EVENTS = "DELETE FROM network_events WHERE created_at < ?"
+
+_SQL_DEVICE_HISTORY = """
+    SELECT id, device_ip, event_type, event_data, severity, source, created_at
+    FROM network_events
+    WHERE device_ip = ?
+    ORDER BY created_at DESC LIMIT ?
+"""
+
+_SQL_DEVICE_HISTORY_BY_TYPE = """
+    SELECT id, device_ip, event_type, event_data, severity, source, created_at
+    FROM network_events
+    WHERE device_ip = ? AND event_type = ?
+    ORDER BY created_at DESC LIMIT ?
+"""
+
+# SET expressions see the pre-update row.
+# Thresholds: 0.5x / 2x of the new baseline (adaptive)
+_SQL_UPSERT_BASELINE = """
+    INSERT INTO network_baselines
+    (device_ip, metric_type, baseline_value, threshold_low, threshold_high, sample_count, updated_at)
+    VALUES (?, ?, ?, ?, ?, 1, ?)
+    ON CONFLICT(device_ip, metric_type) DO UPDATE SET
+        baseline_value = baseline_value
+            + (excluded.baseline_value - baseline_value) / (sample_count + 1),
+        threshold_low = (baseline_value
+            + (excluded.baseline_value - baseline_value) / (sample_count + 1)) * 0.5,
+        threshold_high = (baseline_value
+            + (excluded.baseline_value - baseline_value) / (sample_count + 1)) * 2.0,
+        sample_count = sample_count + 1,
+        updated_at = excluded.updated_at
+"""
+
+# Merge per-key aggregates of a sample batch. The merged mean equals what
+# feeding the samples one by one through _SQL_UPSERT_BASELINE would give.
+_SQL_MERGE_BASELINE_SAMPLES = """
+    INSERT INTO network_baselines
+    (device_ip, metric_type, baseline_value, threshold_low, threshold_high, sample_count, updated_at)
+    SELECT device_ip, metric_type, AVG(value), AVG(value) * 0.5, AVG(value) * 2.0, COUNT(*), ?
+    FROM temp.baseline_samples
+    WHERE true
+    GROUP BY device_ip, metric_type
+    ON CONFLICT(device_ip, metric_type) DO UPDATE SET
+        baseline_value = (baseline_value * sample_count
+            + excluded.baseline_value * excluded.sample_count)
+            / (sample_count + excluded.sample_count),
+        threshold_low = (baseline_value * sample_count
+            + excluded.baseline_value * excluded.sample_count)
+            / (sample_count + excluded.sample_count) * 0.5,
+        threshold_high = (baseline_value * sample_count
+            + excluded.baseline_value * excluded.sample_count)
+            / (sample_count + excluded.sample_count) * 2.0,
+        sample_count = sample_count + excluded.sample_count,
+        updated_at = excluded.updated_at
+"""
+
+_SQL_GET_BASELINE = """
+    SELECT baseline_value, threshold_low, threshold_high, sample_count, updated_at
+    FROM network_baselines
+    WHERE device_ip = ? AND metric_type = ?
+"""
+
+_SQL_ALL_BASELINES = """
+    SELECT device_ip, metric_type, baseline_value, threshold_low,
+           threshold_high, sample_count, updated_at
+    FROM network_baselines
+    ORDER BY device_ip, metric_type
+"""
+
+_SQL_DEVICE_BASELINES = """
+    SELECT device_ip, metric_type, baseline_value, threshold_low,
+           threshold_high, sample_count, updated_at
+    FROM network_baselines WHERE device_ip = ?
+    ORDER BY metric_type
+"""
+
+
+# All counters in one statement / one row
+_SQL_MEMORY_STATS = """
+    SELECT
+        (SELECT COUNT(*) FROM solutions),
+        (SELECT COUNT(*) FROM preferences),
+        (SELECT COUNT(*) FROM patterns),
+        (SELECT COALESCE(SUM(success_count), 0) FROM solutions),
+        (SELECT COUNT(*) FROM network_events),
+        (SELECT COUNT(*) FROM network_baselines)
+"""
+
 
 @dataclass
 class Solution:
@@ -43,6 +346,11 @@ class Solution:
         }
 
 
+def _row_to_solution(row: tuple) -> Solution:
+    """Build a Solution from an (id, problem, ..., metadata) row"""
+    return Solution(*row[:7], _loads(row[7]) if row[7] else {})
+
+
 @dataclass
 class UserPreference:
     """A user preference setting"""
@@ -61,28 +369,134 @@ class LongTermMemory:
     - Learned patterns
     """
     
-    def __init__(self, db_path: str = None):
+    # Prepared statements kept per connection
+    STATEMENT_CACHE_SIZE = 256
+    
+    # UPSERT ... RETURNING needs 3.35; trigram FTS needs 3.34
+    MIN_SQLITE_VERSION = (3, 35, 0)
+    FTS_TRIGRAM_SUPPORTED = sqlite3.sqlite_version_info >= (3, 34, 0)
+    
+    # Hybrid recall weights (BM25 vs. cosine), see find_similar_solutions
+    FTS_WEIGHT = 0.4
+    SEMANTIC_WEIGHT = 0.6
+    
+    # Applied to every connection: reads are served from mapped pages and a
+    # 64 MiB page cache; temp b-trees (ORDER BY, temp tables) stay in RAM
+    CONNECTION_PRAGMAS = (
+        "PRAGMA mmap_size = 268435456",
+        "PRAGMA cache_size = -65536",
+        "PRAGMA temp_store = MEMORY",
+    )
+    # Larger pages hold more JSON/text rows per B-tree page (new files only)
+    PAGE_SIZE = 8192
+    
+    # network_events retention
+    EVENT_RETENTION_DAYS = 30
+    EVENT_PURGE_INTERVAL = 600  # seconds between purges from record_event
+    
+    def __init__(self, db_path: str = None,
+                 embedder: Optional[Callable[[str], List[float]]] = None):
         if db_path is None:
             db_path = os.path.join(
-                os.path.dirname(__file__), 
-                "..", 
-                "data", 
+                os.path.dirname(__file__),
+                "..",
+                "data",
                 "long_term_memory.db"
             )
         
+        if sqlite3.sqlite_version_info < self.MIN_SQLITE_VERSION:
+            raise RuntimeError(
+                f"SQLite {sqlite3.sqlite_version} is too old for long-term memory "
+                f"(need {'.'.join(map(str, self.MIN_SQLITE_VERSION))}+); "
+                "install pysqlite3-binary"
+            )
+        
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self.db_path = db_path
+        self._local = threading.local()
+        self._last_event_purge = time.monotonic()
+        self.embedder = embedder
+        # In-memory (N, D) matrix of unit-norm solution embeddings, used
+        # when sqlite-vec is unavailable; None means rebuild on next query
+        self._emb_lock = threading.Lock()
+        self._emb_matrix = None
+        self._emb_ids = None
+        self._emb_categories = None
         self._init_db()
     
     def _get_connection(self) -> sqlite3.Connection:
-        """Get SQLite connection with threading support"""
-        return sqlite3.connect(self.db_path, check_same_thread=False)
+        """
+        Get this thread's SQLite connection.
+        
+        Connections are opened once per thread and kept, so their prepared
+        statement cache survives between calls. They run in autocommit mode;
+        multi-statement writes use explicit BEGIN/COMMIT.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=self.STATEMENT_CACHE_SIZE,
+                isolation_level=None
+            )
+            for pragma in self.CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._load_extensions(conn)
+            self._local.conn = conn
+        return conn
+    
+    def _get_read_connection(self) -> sqlite3.Connection:
+        """
+        Get this thread's read-only SQLite connection.
+        
+        Searches and lookups use a separate mode=ro connection so, under WAL,
+        they never contend with the writer connection.
+        """
+        conn = getattr(self._local, "read_conn", None)
+        if conn is None:
+            uri = Path(os.path.abspath(self.db_path)).as_uri() + "?mode=ro"
+            conn = sqlite3.connect(
+                uri,
+                uri=True,
+                check_same_thread=False,
+                cached_statements=self.STATEMENT_CACHE_SIZE,
+                isolation_level=None
+            )
+            conn.execute("PRAGMA query_only = 1")
+            for pragma in self.CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.read_vec_loaded = self._load_extensions(conn)
+            self._local.read_conn = conn
+        return conn
+    
+    def _load_extensions(self, conn: sqlite3.Connection) -> bool:
+        """Load sqlite-vec into a connection; True if it is usable there"""
+        if not SQLITE_VEC_AVAILABLE:
+            return False
+        try:
+            conn.enable_load_extension(True)
+            sqlite_vec.load(conn)
+            conn.enable_load_extension(False)
+            return True
+        except (AttributeError, sqlite3.Error) as e:
+            # Python builds without extension loading support
+            print(f"Warning: Could not load sqlite-vec: {e}")
+            return False
     
     def _init_db(self):
         """Initialize database schema"""
         conn = self._get_connection()
         cursor = conn.cursor()
         
+        # Must precede table creation to apply to a new database file
+        if cursor.execute("PRAGMA page_count").fetchone()[0] == 0:
+            cursor.execute(f"PRAGMA page_size = {self.PAGE_SIZE}")
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # WAL lets the read-only connections run alongside writes
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("BEGIN")
+        
         # Solutions table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS solutions (
@@ -118,12 +532,113 @@ class LongTermMemory:
             )
         """)
         
-        # Create FTS for solution search
+        cursor.execute("PRAGMA table_info(patterns)")
+        if "pattern_hash" not in {col[1] for col in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE patterns ADD COLUMN pattern_hash TEXT")
+            self._backfill_pattern_hashes(cursor)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_patterns_type_hash
+            ON patterns(pattern_type, pattern_hash)
+        """)
+        
+        cursor.execute("PRAGMA table_info(solutions)")
+        if "embedding" not in {col[1] for col in cursor.fetchall()}:
+            # float32 vector of problem + solution, for semantic recall
+            cursor.execute("ALTER TABLE solutions ADD COLUMN embedding BLOB")
+        
+        # Create FTS for solution search. The trigram tokenizer (SQLite 3.34+)
+        # matches substrings such as "flap" in "port flapping".
+        fts_tokenizer = "trigram" if self.FTS_TRIGRAM_SUPPORTED else "unicode61"
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'solutions_fts'")
+        row = cursor.fetchone()
+        fts_rebuild = False
+        if row and f"tokenize='{fts_tokenizer}'" not in row[0] and fts_tokenizer != "unicode61":
+            # Created with an older tokenizer — recreate and reindex below
+            cursor.execute("DROP TABLE solutions_fts")
+            fts_rebuild = True
+        
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS solutions_fts
+            USING fts5(problem, solution, category, content=solutions, content_rowid=id,
+                       tokenize='{fts_tokenizer}')
+        """)
+        
+        # One row per (problem, category) so save_solution can UPSERT
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'index' AND name = 'idx_solutions_problem_category'
+        """)
+        if cursor.fetchone() is None:
+            # Fold duplicate counts into the surviving (newest) row first
+            cursor.execute("""
+                UPDATE solutions SET
+                    success_count = (
+                        SELECT SUM(d.success_count) FROM solutions d
+                        WHERE d.problem = solutions.problem
+                          AND d.category IS solutions.category
+                    ),
+                    last_used = (
+                        SELECT MAX(d.last_used) FROM solutions d
+                        WHERE d.problem = solutions.problem
+                          AND d.category IS solutions.category
+                    )
+                WHERE id IN (
+                    SELECT MAX(id) FROM solutions GROUP BY problem, category
+                    HAVING COUNT(*) > 1
+                )
+            """)
+            cursor.execute("""
+                DELETE FROM solutions WHERE id NOT IN (
+                    SELECT MAX(id) FROM solutions GROUP BY problem, category
+                )
+            """)
+            cursor.execute("""
+                CREATE UNIQUE INDEX idx_solutions_problem_category
+                ON solutions(problem, category)
+            """)
+        
+        # Keep the external-content FTS index in sync with solutions
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'trigger' AND name = 'solutions_fts_ai'
+        """)
+        if cursor.fetchone() is None:
+            # Older databases only indexed the first version of each solution
+            fts_rebuild = True
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS solutions_fts_ai AFTER INSERT ON solutions BEGIN
+                INSERT INTO solutions_fts (rowid, problem, solution, category)
+                VALUES (new.id, new.problem, new.solution, new.category);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS solutions_fts_ad AFTER DELETE ON solutions BEGIN
+                INSERT INTO solutions_fts (solutions_fts, rowid, problem, solution, category)
+                VALUES ('delete', old.id, old.problem, old.solution, old.category);
+            END
+        """)
+        # Only reindex when indexed text changes, not on success_count/last_used bumps
+        cursor.execute("""
+            SELECT sql FROM sqlite_master
+            WHERE type = 'trigger' AND name = 'solutions_fts_au'
+        """)
+        row = cursor.fetchone()
+        if row is not None and "UPDATE OF" not in row[0]:
+            cursor.execute("DROP TRIGGER solutions_fts_au")
         cursor.execute("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS solutions_fts 
-            USING fts5(problem, solution, category, content=solutions, content_rowid=id)
+            CREATE TRIGGER IF NOT EXISTS solutions_fts_au
+            AFTER UPDATE OF problem, solution, category ON solutions BEGIN
+                INSERT INTO solutions_fts (solutions_fts, rowid, problem, solution, category)
+                VALUES ('delete', old.id, old.problem, old.solution, old.category);
+                INSERT INTO solutions_fts (rowid, problem, solution, category)
+                VALUES (new.id, new.problem, new.solution, new.category);
+            END
         """)
         
+        if fts_rebuild:
+            cursor.execute("INSERT INTO solutions_fts (solutions_fts) VALUES ('rebuild')")
+        
         # Network events table — records every significant network event
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS network_events (
@@ -136,6 +651,14 @@ class LongTermMemory:
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_events_created
+            ON network_events(created_at)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_events_device_created
+            ON network_events(device_ip, created_at)
+        """)
         
         # Network baselines — learned "normal" values per device/metric
         cursor.execute("""
@@ -152,8 +675,30 @@ class LongTermMemory:
             )
         """)
         
-        conn.commit()
-        conn.close()
+        cursor.execute("COMMIT")
+    
+    @staticmethod
+    def _backfill_pattern_hashes(cursor: sqlite3.Cursor):
+        """Hash pre-existing patterns, merging rows that only differed in key order"""
+        rows = cursor.execute("""
+            SELECT id, pattern_type, pattern_data, frequency FROM patterns ORDER BY id
+        """).fetchall()
+        
+        kept: Dict[tuple, int] = {}
+        for pattern_id, pattern_type, pattern_data, frequency in rows:
+            digest = _pattern_hash(_loads(pattern_data) if pattern_data else None)
+            key = (pattern_type, digest)
+            if key in kept:
+                cursor.execute(
+                    "UPDATE patterns SET frequency = frequency + ? WHERE id = ?",
+                    (frequency or 1, kept[key])
+                )
+                cursor.execute("DELETE FROM patterns WHERE id = ?", (pattern_id,))
+            else:
+                kept[key] = pattern_id
+                cursor.execute(
+                    "UPDATE patterns SET pattern_hash = ? WHERE id = ?", (digest, pattern_id)
+                )
     
     # ============= Solution Management =============
     
@@ -165,48 +710,21 @@ class LongTermMemory:
         metadata: Dict = None
     ) -> Solution:
         """Save a new solution or update existing"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        cursor = self._get_connection().cursor()
         
         now = datetime.now().isoformat()
-        metadata_json = json.dumps(metadata or {})
+        metadata_json = _dumps(metadata or {})
         
-        # Check if similar problem exists
-        cursor.execute("""
-            SELECT id, success_count FROM solutions 
-            WHERE problem = ? AND category = ?
-        """, (problem, category))
+        # Insert new or bump the existing (problem, category) entry;
+        # FTS is kept in sync by the solutions_fts_* triggers
+        cursor.execute(_SQL_UPSERT_SOLUTION,
+                       (problem, solution, category, now, now, metadata_json))
+        solution_id, success_count, created_at = cursor.fetchone()
         
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Update existing
-            cursor.execute("""
-                UPDATE solutions 
-                SET solution = ?, success_count = success_count + 1, 
-                    last_used = ?, metadata = ?
-                WHERE id = ?
-            """, (solution, now, metadata_json, existing[0]))
-            solution_id = existing[0]
-            success_count = existing[1] + 1
-        else:
-            # Insert new
-            cursor.execute("""
-                INSERT INTO solutions (problem, solution, category, success_count, 
-                                       last_used, created_at, metadata)
-                VALUES (?, ?, ?, 1, ?, ?, ?)
-            """, (problem, solution, category, now, now, metadata_json))
-            solution_id = cursor.lastrowid
-            success_count = 1
-            
-            # Update FTS
-            cursor.execute("""
-                INSERT INTO solutions_fts (rowid, problem, solution, category)
-                VALUES (?, ?, ?, ?)
-            """, (solution_id, problem, solution, category))
-        
-        conn.commit()
-        conn.close()
+        embedding = self._embed(f"{problem}\n{solution}")
+        if embedding is not None:
+            cursor.execute(_SQL_SET_SOLUTION_EMBEDDING, (embedding, solution_id))
+            self._emb_matrix = None
         
         return Solution(
             id=solution_id,
@@ -215,7 +733,7 @@ class LongTermMemory:
             category=category,
             success_count=success_count,
             last_used=now,
-            created_at=now,
+            created_at=created_at,
             metadata=metadata or {}
         )
     
@@ -223,322 +741,310 @@ class LongTermMemory:
         self,
         query: str,
         category: str = None,
-        limit: int = 5
+        limit: int = 5,
+        semantic_query: str = None
     ) -> List[Solution]:
-        """Find solutions similar to the query"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        """
+        Find solutions similar to the query (FTS5 MATCH, ranked by BM25)
+        
+        With an embedder configured, results are fused with a cosine
+        nearest-neighbour search over solution embeddings:
+        FTS_WEIGHT * normalized BM25 + SEMANTIC_WEIGHT * cosine.
+        semantic_query is the plain-text form of query used for embedding.
+        """
+        cursor = self._get_read_connection().cursor()
         
         # Use FTS for search
         if category:
-            cursor.execute("""
-                SELECT s.id, s.problem, s.solution, s.category, 
-                       s.success_count, s.last_used, s.created_at, s.metadata
-                FROM solutions s
-                JOIN solutions_fts fts ON s.id = fts.rowid
-                WHERE solutions_fts MATCH ? AND s.category = ?
-                ORDER BY s.success_count DESC
-                LIMIT ?
-            """, (query, category, limit))
+            cursor.execute(_SQL_SEARCH_SOLUTIONS_BY_CATEGORY, (query, category, limit))
         else:
-            cursor.execute("""
-                SELECT s.id, s.problem, s.solution, s.category, 
-                       s.success_count, s.last_used, s.created_at, s.metadata
-                FROM solutions s
-                JOIN solutions_fts fts ON s.id = fts.rowid
-                WHERE solutions_fts MATCH ?
-                ORDER BY s.success_count DESC
-                LIMIT ?
-            """, (query, limit))
-        
-        solutions = []
-        for row in cursor.fetchall():
-            solutions.append(Solution(
-                id=row[0],
-                problem=row[1],
-                solution=row[2],
-                category=row[3],
-                success_count=row[4],
-                last_used=row[5],
-                created_at=row[6],
-                metadata=json.loads(row[7]) if row[7] else {}
-            ))
-        
-        conn.close()
-        return solutions
+            cursor.execute(_SQL_SEARCH_SOLUTIONS, (query, limit))
+        fts_rows = cursor.fetchall()
+        
+        semantic = self._semantic_search(semantic_query or query, category, limit)
+        if not semantic:
+            return list(map(_row_to_solution, fts_rows))
+        
+        # bm25() is lower-is-better; map the hits onto 0..1
+        scores: Dict[int, float] = {}
+        if fts_rows:
+            ranks = [row[8] for row in fts_rows]
+            best, worst = min(ranks), max(ranks)
+            spread = (worst - best) or 1.0
+            for row in fts_rows:
+                scores[row[0]] = self.FTS_WEIGHT * (worst - row[8]) / spread
+        for solution_id, similarity in semantic:
+            scores[solution_id] = scores.get(solution_id, 0.0) + self.SEMANTIC_WEIGHT * similarity
+        
+        ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+        rows = {row[0]: row for row in fts_rows}
+        missing = [solution_id for solution_id in ranked if solution_id not in rows]
+        if missing:
+            cursor.execute(_SQL_SOLUTIONS_BY_IDS, (_dumps(missing),))
+            rows.update((row[0], row) for row in cursor)
+        
+        return [_row_to_solution(rows[solution_id]) for solution_id in ranked if solution_id in rows]
+    
+    def _embed(self, text: str) -> Optional[bytes]:
+        """Embed text as a float32 BLOB, or None without a working embedder"""
+        if self.embedder is None:
+            return None
+        try:
+            return array("f", self.embedder(text)).tobytes()
+        except Exception as e:
+            print(f"Warning: Could not embed text for semantic recall: {e}")
+            return None
+    
+    def _semantic_search(self, text: str, category: Optional[str],
+                         limit: int) -> List[tuple]:
+        """(solution_id, cosine similarity) nearest neighbours of text"""
+        query_vec = self._embed(text)
+        if query_vec is None:
+            return []
+        
+        conn = self._get_read_connection()
+        if not self._local.read_vec_loaded:
+            return self._semantic_search_numpy(query_vec, category, limit)
+        
+        try:
+            if category:
+                cursor = conn.execute(_SQL_SEMANTIC_SOLUTIONS_BY_CATEGORY,
+                                      (query_vec, query_vec, category, limit))
+            else:
+                cursor = conn.execute(_SQL_SEMANTIC_SOLUTIONS, (query_vec, query_vec, limit))
+            return cursor.fetchall()
+        except sqlite3.OperationalError as e:
+            # Fall back to FTS-only results rather than failing the search
+            print(f"Warning: sqlite-vec search failed: {e}")
+            return []
+    
+    def _semantic_search_numpy(self, query_vec: bytes, category: Optional[str],
+                               limit: int) -> List[tuple]:
+        """In-memory cosine search: one matrix-vector product over all embeddings"""
+        if not NUMPY_AVAILABLE:
+            return []
+        
+        with self._emb_lock:
+            if self._emb_matrix is None:
+                self._load_embedding_matrix()
+            matrix, ids, categories = self._emb_matrix, self._emb_ids, self._emb_categories
+        
+        query = np.frombuffer(query_vec, dtype=np.float32)
+        if not len(ids) or matrix.shape[1] != query.shape[0]:
+            return []
+        norm = np.linalg.norm(query)
+        if not norm:
+            return []
+        
+        scores = matrix @ (query / norm)
+        if category:
+            scores = np.where(categories == category, scores, -np.inf)
+        
+        # Partial selection of the top hits, then sort only those
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+    
+    def _load_embedding_matrix(self):
+        """Read all solution embeddings into a row-normalized float32 matrix"""
+        rows = self._get_read_connection().execute(_SQL_SOLUTION_EMBEDDINGS).fetchall()
+        
+        # Skip vectors from an older embeddings model with a different size
+        dim = len(rows[-1][2]) if rows else 0
+        rows = [row for row in rows if len(row[2]) == dim]
+        
+        matrix = np.frombuffer(b"".join(row[2] for row in rows), dtype=np.float32)
+        matrix = matrix.reshape(len(rows), dim // 4 if dim else 0)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        
+        self._emb_matrix = matrix / norms
+        self._emb_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self._emb_categories = np.array([row[1] for row in rows], dtype=object)
     
     def get_top_solutions(self, category: str = None, limit: int = 10) -> List[Solution]:
         """Get most successful solutions"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        cursor = self._get_read_connection().cursor()
         
         if category:
-            cursor.execute("""
-                SELECT id, problem, solution, category, success_count, 
-                       last_used, created_at, metadata
-                FROM solutions
-                WHERE category = ?
-                ORDER BY success_count DESC
-                LIMIT ?
-            """, (category, limit))
+            cursor.execute(_SQL_TOP_SOLUTIONS_BY_CATEGORY, (category, limit))
         else:
-            cursor.execute("""
-                SELECT id, problem, solution, category, success_count, 
-                       last_used, created_at, metadata
-                FROM solutions
-                ORDER BY success_count DESC
-                LIMIT ?
-            """, (limit,))
-        
-        solutions = []
-        for row in cursor.fetchall():
-            solutions.append(Solution(
-                id=row[0],
-                problem=row[1],
-                solution=row[2],
-                category=row[3],
-                success_count=row[4],
-                last_used=row[5],
-                created_at=row[6],
-                metadata=json.loads(row[7]) if row[7] else {}
-            ))
-        
-        conn.close()
-        return solutions
+            cursor.execute(_SQL_TOP_SOLUTIONS, (limit,))
+        
+        return list(map(_row_to_solution, cursor))
     
     def mark_solution_used(self, solution_id: int) -> bool:
         """Mark a solution as used (increment success count)"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            UPDATE solutions 
-            SET success_count = success_count + 1, last_used = ?
-            WHERE id = ?
-        """, (datetime.now().isoformat(), solution_id))
-        
-        updated = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        
-        return updated
+        cursor = self._get_connection().cursor()
+        cursor.execute(_SQL_MARK_SOLUTION_USED, (datetime.now().isoformat(), solution_id))
+        return cursor.rowcount > 0
     
     # ============= Preferences Management =============
     
     def set_preference(self, key: str, value: str):
         """Set a user preference"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO preferences (key, value, updated_at)
-            VALUES (?, ?, ?)
-        """, (key, value, datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
+        self._get_connection().execute(
+            _SQL_SET_PREFERENCE, (key, value, datetime.now().isoformat())
+        )
     
     def get_preference(self, key: str, default: str = None) -> Optional[str]:
         """Get a user preference"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT value FROM preferences WHERE key = ?", (key,))
-        row = cursor.fetchone()
-        
-        conn.close()
+        row = self._get_read_connection().execute(_SQL_GET_PREFERENCE, (key,)).fetchone()
         return row[0] if row else default
     
     def get_all_preferences(self) -> Dict[str, str]:
         """Get all preferences"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT key, value FROM preferences")
-        prefs = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        conn.close()
-        return prefs
+        cursor = self._get_read_connection().execute(_SQL_ALL_PREFERENCES)
+        return {row[0]: row[1] for row in cursor.fetchall()}
     
     # ============= Pattern Learning =============
     
     def record_pattern(self, pattern_type: str, pattern_data: Dict):
         """Record a learned pattern"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        cursor = self._get_connection().cursor()
         
-        data_json = json.dumps(pattern_data)
         now = datetime.now().isoformat()
         
-        # Check if pattern exists
-        cursor.execute("""
-            SELECT id, frequency FROM patterns 
-            WHERE pattern_type = ? AND pattern_data = ?
-        """, (pattern_type, data_json))
-        
-        existing = cursor.fetchone()
-        
-        if existing:
-            cursor.execute("""
-                UPDATE patterns 
-                SET frequency = frequency + 1, last_seen = ?
-                WHERE id = ?
-            """, (now, existing[0]))
-        else:
-            cursor.execute("""
-                INSERT INTO patterns (pattern_type, pattern_data, frequency, 
-                                      last_seen, created_at)
-                VALUES (?, ?, 1, ?, ?)
-            """, (pattern_type, data_json, now, now))
-        
-        conn.commit()
-        conn.close()
+        # Matched on a fixed-size digest of the canonical JSON, so key order
+        # doesn't matter and the lookup is an index probe
+        cursor.execute(_SQL_UPSERT_PATTERN, (
+            pattern_type, _dumps(pattern_data), _pattern_hash(pattern_data), now, now
+        ))
     
     def get_common_patterns(self, pattern_type: str = None, limit: int = 10) -> List[Dict]:
         """Get most common patterns"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        cursor = self._get_read_connection().cursor()
         
         if pattern_type:
-            cursor.execute("""
-                SELECT pattern_type, pattern_data, frequency, last_seen
-                FROM patterns
-                WHERE pattern_type = ?
-                ORDER BY frequency DESC
-                LIMIT ?
-            """, (pattern_type, limit))
+            cursor.execute(_SQL_COMMON_PATTERNS_BY_TYPE, (pattern_type, limit))
         else:
-            cursor.execute("""
-                SELECT pattern_type, pattern_data, frequency, last_seen
-                FROM patterns
-                ORDER BY frequency DESC
-                LIMIT ?
-            """, (limit,))
-        
-        patterns = []
-        for row in cursor.fetchall():
-            patterns.append({
-                "type": row[0],
-                "data": json.loads(row[1]),
-                "frequency": row[2],
-                "last_seen": row[3]
-            })
-        
-        conn.close()
-        return patterns
+            cursor.execute(_SQL_COMMON_PATTERNS, (limit,))
+        
+        # Iterate the cursor directly: rows are converted as they are
+        # stepped instead of materializing a fetchall() list first
+        return list(map(_row_to_pattern, cursor))
     
     # ============= Stats =============
     
     # ============= NETWORK INTELLIGENCE =============
     
-    def record_event(self, device_ip: str, event_type: str, 
+    def record_event(self, device_ip: str, event_type: str,
                      event_data: Dict, severity: str = "info",
                      source: str = "manual") -> int:
         """Record a network event for historical analysis"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO network_events (device_ip, event_type, event_data, severity, source, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            device_ip, event_type, json.dumps(event_data),
+        cursor = self._get_connection().cursor()
+        cursor.execute(_SQL_INSERT_EVENT, (
+            device_ip, event_type, _dumps(event_data),
             severity, source, datetime.now().isoformat()
         ))
-        
         event_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        
+        if time.monotonic() - self._last_event_purge >= self.EVENT_PURGE_INTERVAL:
+            self.purge_old_events()
+        
         return event_id
     
+    def purge_old_events(self, retention_days: int = None) -> int:
+        """Delete network events older than the retention window"""
+        self._last_event_purge = time.monotonic()
+        days = retention_days if retention_days is not None else self.EVENT_RETENTION_DAYS
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        
+        try:
+            conn = self._get_connection()
+            deleted = conn.execute(_SQL_PURGE_EVENTS, (cutoff,)).rowcount
+            if deleted:
+                conn.execute("PRAGMA incremental_vacuum(1000)")
+            return deleted
+        except sqlite3.Error as e:
+            print(f"Warning: Could not purge old network events: {e}")
+            return 0
+    
     def get_device_history(self, device_ip: str, event_type: str = None,
-                           limit: int = 20) -> List[Dict]:
-        """Get event history for a device"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        if event_type:
-            cursor.execute("""
+                           limit: int = 20,
+                           data_filters: Dict[str, Any] = None,
+                           decode_data: bool = True) -> List[Dict]:
+        """
+        Get event history for a device
+        
+        data_filters matches top-level event_data fields inside SQLite
+        (json_extract), e.g. {"status": "down"}. With decode_data=False,
+        event_data is returned as the stored JSON text, for callers that
+        only display it.
+        """
+        cursor = self._get_read_connection().cursor()
+        
+        if data_filters:
+            clauses = ["device_ip = ?"]
+            params: List[Any] = [device_ip]
+            if event_type:
+                clauses.append("event_type = ?")
+                params.append(event_type)
+            for key, value in data_filters.items():
+                clauses.append("json_extract(event_data, ?) = ?")
+                params.extend((f"$.{key}", value))
+            params.append(limit)
+            cursor.execute(f"""
                 SELECT id, device_ip, event_type, event_data, severity, source, created_at
                 FROM network_events
-                WHERE device_ip = ? AND event_type = ?
+                WHERE {" AND ".join(clauses)}
                 ORDER BY created_at DESC LIMIT ?
-            """, (device_ip, event_type, limit))
+            """, params)
+        elif event_type:
+            cursor.execute(_SQL_DEVICE_HISTORY_BY_TYPE, (device_ip, event_type, limit))
         else:
-            cursor.execute("""
-                SELECT id, device_ip, event_type, event_data, severity, source, created_at
-                FROM network_events
-                WHERE device_ip = ?
-                ORDER BY created_at DESC LIMIT ?
-            """, (device_ip, limit))
-        
-        rows = cursor.fetchall()
-        conn.close()
+            cursor.execute(_SQL_DEVICE_HISTORY, (device_ip, limit))
         
-        return [
-            {
-                "id": r[0], "device_ip": r[1], "event_type": r[2],
-                "event_data": json.loads(r[3]) if r[3] else {},
-                "severity": r[4], "source": r[5], "created_at": r[6]
-            }
-            for r in rows
-        ]
+        return list(map(_row_to_event if decode_data else _row_to_raw_event, cursor))
     
     def update_baseline(self, device_ip: str, metric_type: str, value: float):
         """Update the baseline for a device metric using rolling average"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Check if baseline exists
-        cursor.execute("""
-            SELECT baseline_value, sample_count, threshold_low, threshold_high
-            FROM network_baselines
-            WHERE device_ip = ? AND metric_type = ?
-        """, (device_ip, metric_type))
-        
-        row = cursor.fetchone()
-        now = datetime.now().isoformat()
-        
-        if row:
-            old_avg, count, _, _ = row
-            new_count = count + 1
-            # Rolling average
-            new_avg = old_avg + (value - old_avg) / new_count
-            # Thresholds: ±30% of baseline (adaptive)
-            threshold_low = new_avg * 0.5
-            threshold_high = new_avg * 2.0
-            
-            cursor.execute("""
-                UPDATE network_baselines
-                SET baseline_value = ?, threshold_low = ?, threshold_high = ?,
-                    sample_count = ?, updated_at = ?
-                WHERE device_ip = ? AND metric_type = ?
-            """, (new_avg, threshold_low, threshold_high, new_count, now,
-                   device_ip, metric_type))
-        else:
-            # First measurement — initialize baseline
-            cursor.execute("""
-                INSERT INTO network_baselines 
-                (device_ip, metric_type, baseline_value, threshold_low, threshold_high, sample_count, updated_at)
-                VALUES (?, ?, ?, ?, ?, 1, ?)
-            """, (device_ip, metric_type, value, value * 0.5, value * 2.0, now))
-        
-        conn.commit()
-        conn.close()
+        # Single UPSERT: first measurement initializes the baseline, later ones
+        # fold into the rolling average
+        self._get_connection().execute(_SQL_UPSERT_BASELINE, (
+            device_ip, metric_type, value, value * 0.5, value * 2.0,
+            datetime.now().isoformat()
+        ))
     
-    def get_baseline(self, device_ip: str, metric_type: str) -> Optional[Dict]:
-        """Get the learned baseline for a device metric"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+    def update_baselines_bulk(self, samples: List[tuple]) -> int:
+        """
+        Fold many (device_ip, metric_type, value) samples into baselines at once
         
-        cursor.execute("""
-            SELECT baseline_value, threshold_low, threshold_high, sample_count, updated_at
-            FROM network_baselines
-            WHERE device_ip = ? AND metric_type = ?
-        """, (device_ip, metric_type))
+        Samples are staged in a temp table and aggregated per device/metric
+        in SQL, so a replay or bulk reload costs a couple of statements
+        instead of one UPSERT per sample. Returns the number of samples.
+        """
+        if not samples:
+            return 0
         
-        row = cursor.fetchone()
-        conn.close()
+        conn = self._get_connection()
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS baseline_samples (
+                device_ip TEXT, metric_type TEXT, value REAL
+            )
+        """)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO temp.baseline_samples (device_ip, metric_type, value) VALUES (?, ?, ?)",
+                samples
+            )
+            conn.execute(_SQL_MERGE_BASELINE_SAMPLES, (datetime.now().isoformat(),))
+            conn.execute("DELETE FROM temp.baseline_samples")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        
+        return len(samples)
+    
+    def _get_baseline_with_conn(self, conn: sqlite3.Connection, device_ip: str,
+                                metric_type: str) -> Optional[Dict]:
+        """Read a baseline on an already-acquired connection"""
+        row = conn.execute(_SQL_GET_BASELINE, (device_ip, metric_type)).fetchone()
         
         if not row:
             return None
@@ -553,11 +1059,56 @@ class LongTermMemory:
             "updated_at": row[4],
         }
     
-    def is_anomalous(self, device_ip: str, metric_type: str, 
-                      current_value: float) -> Dict:
-        """Check if a current value is anomalous compared to baseline"""
-        baseline = self.get_baseline(device_ip, metric_type)
-        
+    def get_baseline(self, device_ip: str, metric_type: str) -> Optional[Dict]:
+        """Get the learned baseline for a device metric"""
+        return self._get_baseline_with_conn(self._get_read_connection(), device_ip, metric_type)
+    
+    def is_anomalous(self, device_ip: str, metric_type: str,
+                      current_value: float, learn: bool = False,
+                      record_anomaly: bool = False) -> Dict:
+        """
+        Check if a current value is anomalous compared to baseline
+        
+        Args:
+            learn: Also fold current_value into the baseline
+            record_anomaly: Record an 'anomaly' network event when anomalous
+        
+        The baseline read, verdict and optional writes share one connection
+        and one transaction.
+        """
+        conn = self._get_connection()
+        writes = learn or record_anomaly
+        if writes:
+            conn.execute("BEGIN IMMEDIATE")
+        try:
+            baseline = self._get_baseline_with_conn(conn, device_ip, metric_type)
+            result = self._evaluate_against_baseline(baseline, current_value)
+            now = datetime.now().isoformat()
+            
+            if record_anomaly and result["anomalous"]:
+                conn.execute(_SQL_INSERT_EVENT, (
+                    device_ip, "anomaly",
+                    _dumps({"metric": metric_type, **result}),
+                    "warning", "baseline", now
+                ))
+            if learn:
+                conn.execute(_SQL_UPSERT_BASELINE, (
+                    device_ip, metric_type, current_value,
+                    current_value * 0.5, current_value * 2.0, now
+                ))
+            
+            if writes:
+                conn.execute("COMMIT")
+        except Exception:
+            if writes:
+                conn.execute("ROLLBACK")
+            raise
+        
+        return result
+    
+    @staticmethod
+    def _evaluate_against_baseline(baseline: Optional[Dict], current_value: float) -> Dict:
+        """Pure verdict for is_anomalous"""
         if not baseline or baseline["sample_count"] < 3:
             return {
                 "anomalous": False,
@@ -591,64 +1142,23 @@ class LongTermMemory:
     
     def get_all_baselines(self, device_ip: str = None) -> List[Dict]:
         """Get all baselines, optionally filtered by device"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        cursor = self._get_read_connection().cursor()
         
         if device_ip:
-            cursor.execute("""
-                SELECT device_ip, metric_type, baseline_value, threshold_low, 
-                       threshold_high, sample_count, updated_at
-                FROM network_baselines WHERE device_ip = ?
-                ORDER BY metric_type
-            """, (device_ip,))
+            cursor.execute(_SQL_DEVICE_BASELINES, (device_ip,))
         else:
-            cursor.execute("""
-                SELECT device_ip, metric_type, baseline_value, threshold_low, 
-                       threshold_high, sample_count, updated_at
-                FROM network_baselines
-                ORDER BY device_ip, metric_type
-            """)
-        
-        rows = cursor.fetchall()
-        conn.close()
+            cursor.execute(_SQL_ALL_BASELINES)
         
-        return [
-            {
-                "device_ip": r[0], "metric_type": r[1],
-                "baseline_value": r[2], "threshold_low": r[3],
-                "threshold_high": r[4], "sample_count": r[5],
-                "updated_at": r[6]
-            }
-            for r in rows
-        ]
+        return list(map(_row_to_baseline, cursor))
     
     # ============= STATS =============
     
     def get_memory_stats(self) -> Dict[str, Any]:
         """Get memory statistics"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM solutions")
-        solutions_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM preferences")
-        prefs_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM patterns")
-        patterns_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT SUM(success_count) FROM solutions")
-        total_uses = cursor.fetchone()[0] or 0
-        
-        # Network intelligence stats
-        cursor.execute("SELECT COUNT(*) FROM network_events")
-        events_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM network_baselines")
-        baselines_count = cursor.fetchone()[0]
-        
-        conn.close()
+        (
+            solutions_count, prefs_count, patterns_count,
+            total_uses, events_count, baselines_count
+        ) = self._get_read_connection().execute(_SQL_MEMORY_STATS).fetchone()
         
         return {
             "solutions_stored": solutions_count,
@@ -660,5 +1170,20 @@ class LongTermMemory:
         }
 
 
-# Singleton instance
-long_term_memory = LongTermMemory()
+@functools.cache
+def get_long_term_memory() -> LongTermMemory:
+    """Shared LongTermMemory instance, created on first use"""
+    from config import config
+    
+    embedder = None
+    if config.MEMORY_SEMANTIC_RECALL:
+        from agent.rag_knowledge import get_knowledge_base
+        embedder = get_knowledge_base().embed_query
+    return LongTermMemory(embedder=embedder)
+
+
+def __getattr__(name: str):
+    # Back-compat: `long_term_memory` resolves to the lazy singleton
+    if name == "long_term_memory":
+        return get_long_term_memory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,14 +8,71 @@ Features:
 - Device relationship tracking
 """
 import asyncio
+import ipaddress
+import os
 import socket
+import struct
 import subprocess
+import sys
 import re
 import json
 from datetime import datetime
 from typing import List, Dict, Optional, Any, Set
 from dataclasses import dataclass, field
 from enum import Enum
+from itertools import islice
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+try:
+    import netifaces
+    NETIFACES_AVAILABLE = True
+except ImportError:
+    NETIFACES_AVAILABLE = False
+
+try:
+    from icmplib import async_multiping
+    from icmplib.exceptions import ICMPLibError
+    ICMPLIB_AVAILABLE = True
+except ImportError:
+    ICMPLIB_AVAILABLE = False
+
+
+MAX_SWEEP_HOSTS = 254  # default sweep size when no end is given (one /24)
+
+_IP_RE = re.compile(r'(\d+\.\d+\.\d+\.\d+)')
+_MAC_RE = re.compile(r'(?:[0-9a-fA-F]{2}[:-]){5}[0-9a-fA-F]{2}')
+
+# Common vendor prefixes (simplified), keyed by the 24-bit OUI
+_OUI_VENDORS = {
+    int(prefix.replace(':', ''), 16): vendor
+    for prefix, vendor in {
+        "00:50:56": "VMware",
+        "00:0C:29": "VMware",
+        "08:00:27": "VirtualBox",
+        "52:54:00": "QEMU/KVM",
+        "B8:27:EB": "Raspberry Pi",
+        "DC:A6:32": "Raspberry Pi",
+        "00:1A:2B": "Cisco",
+        "00:1B:2B": "Cisco",
+        "00:1C:B3": "Cisco",
+        "00:22:55": "Cisco",
+        "4C:5E:0C": "Mikrotik",
+        "6C:3B:6B": "Mikrotik",
+        "00:0C:42": "Mikrotik",
+        "00:23:CD": "TP-Link",
+        "50:C7:BF": "TP-Link",
+        "00:1F:A4": "D-Link",
+        "00:26:5A": "D-Link",
+        "00:1E:58": "Ubiquiti",
+        "24:A4:3C": "Ubiquiti",
+        "FC:EC:DA": "Ubiquiti",
+    }.items()
+}
 
 
 class NodeType(Enum):
@@ -28,6 +85,27 @@ class NodeType(Enum):
     UNKNOWN = "unknown"
 
 
+_MERMAID_HEADER = (
+    "graph TD",
+    "    classDef gateway fill:#e74c3c,stroke:#c0392b,color:white",
+    "    classDef router fill:#3498db,stroke:#2980b9,color:white",
+    "    classDef server fill:#2ecc71,stroke:#27ae60,color:white",
+    "    classDef workstation fill:#9b59b6,stroke:#8e44ad,color:white",
+    "    classDef unknown fill:#95a5a6,stroke:#7f8c8d,color:white",
+)
+
+# Bitmask of ports that mark a host as a server (ssh, http(s), mysql, postgres)
+_SERVER_PORT_MASK = sum(1 << port for port in (22, 80, 443, 3306, 5432))
+
+# Node shape based on type
+_MERMAID_NODE = {
+    NodeType.GATEWAY: '    {id}["{label}"]:::gateway',
+    NodeType.ROUTER: '    {id}{{"{label}"}}:::router',
+    NodeType.SERVER: '    {id}[("{label}")]:::server',
+}
+_MERMAID_NODE_DEFAULT = '    {id}["{label}"]:::unknown'
+
+
 @dataclass
 class NetworkNode:
     """A node in the network topology"""
@@ -40,6 +118,18 @@ class NetworkNode:
     ports_open: List[int] = field(default_factory=list)
     is_gateway: bool = False
     last_seen: str = ""
+    # Bit p set <=> port p open; kept in step with ports_open
+    ports_mask: int = field(default=0, repr=False)
+    
+    def __post_init__(self):
+        for port in self.ports_open:
+            self.ports_mask |= 1 << port
+    
+    def add_open_port(self, port: int):
+        """Record an open port"""
+        if not self.ports_mask >> port & 1:
+            self.ports_open.append(port)
+            self.ports_mask |= 1 << port
     
     def to_dict(self) -> dict:
         return {
@@ -89,36 +179,37 @@ class NetworkTopology:
         self._gateway_ip: Optional[str] = None
         self._local_ip: Optional[str] = None
         self._subnet: Optional[str] = None
+        self._network: Optional[ipaddress.IPv4Network] = None
+        self._gateway_node: Optional[NetworkNode] = None
+    
+    def _add_node(self, node: NetworkNode):
+        """Insert or replace a node, keeping the gateway reference current"""
+        self.nodes[node.id] = node
+        if node.is_gateway:
+            self._gateway_node = node
+        elif self._gateway_node is not None and self._gateway_node.id == node.id:
+            self._gateway_node = None
     
     def _detect_local_network(self):
-        """Detect local network information"""
+        """Detect local network information (no subprocesses)"""
         try:
-            # Get local IP first (works on all platforms)
+            # Get local IP first (works on all platforms; no packet is sent)
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             s.connect(("8.8.8.8", 80))
             self._local_ip = s.getsockname()[0]
             s.close()
             
-            # Determine subnet from local IP
+            # Determine subnet from the interface's real netmask
             if self._local_ip:
+                self._network = ipaddress.ip_interface(
+                    f"{self._local_ip}/{self._get_local_netmask() or 24}"
+                ).network
                 parts = self._local_ip.split('.')
                 self._subnet = f"{parts[0]}.{parts[1]}.{parts[2]}"
             
-            # Try to get gateway - Windows method using ipconfig
-            try:
-                result = subprocess.run(
-                    ['ipconfig'],
-                    capture_output=True, text=True, timeout=5
-                )
-                # Find "Default Gateway" line
-                for line in result.stdout.split('\n'):
-                    if 'Default Gateway' in line or 'Gateway' in line:
-                        match = re.search(r'(\d+\.\d+\.\d+\.\d+)', line)
-                        if match:
-                            self._gateway_ip = match.group(1)
-                            break
-            except Exception:
-                pass
+            gateway = self._get_default_gateway()
+            if gateway:
+                self._gateway_ip = gateway
             
             # Fallback: assume gateway is .1 of subnet
             if not self._gateway_ip and self._subnet:
@@ -127,68 +218,242 @@ class NetworkTopology:
         except Exception as e:
             print(f"Error detecting network: {e}")
     
+    def _get_local_netmask(self) -> Optional[str]:
+        """Netmask of the interface holding the local IP (psutil)"""
+        if not PSUTIL_AVAILABLE:
+            return None
+        for addrs in psutil.net_if_addrs().values():
+            for addr in addrs:
+                if addr.family == socket.AF_INET and addr.address == self._local_ip:
+                    return addr.netmask
+        return None
+    
+    @staticmethod
+    def _get_default_gateway() -> Optional[str]:
+        """IPv4 default gateway from the OS routing table"""
+        try:
+            if NETIFACES_AVAILABLE:
+                default = netifaces.gateways().get("default", {})
+                if netifaces.AF_INET in default:
+                    return default[netifaces.AF_INET][0]
+            
+            if sys.platform.startswith("linux"):
+                with open("/proc/net/route") as f:
+                    # Iface  Destination  Gateway  Flags ... (hex, little-endian)
+                    for line in f.read().splitlines()[1:]:
+                        fields = line.split()
+                        if len(fields) >= 4 and fields[1] == "00000000" and int(fields[3], 16) & 0x2:
+                            return socket.inet_ntoa(struct.pack("<L", int(fields[2], 16)))
+            
+            elif sys.platform == "win32":
+                import ctypes
+                
+                # MIB_IPFORWARDROW is 14 DWORDs; dwForwardNextHop is the 4th
+                row = (ctypes.c_ulong * 14)()
+                dest = struct.unpack("<L", socket.inet_aton("8.8.8.8"))[0]
+                if ctypes.windll.iphlpapi.GetBestRoute(dest, 0, ctypes.byref(row)) == 0 and row[3]:
+                    return socket.inet_ntoa(struct.pack("<L", row[3]))
+        except Exception:
+            pass
+        return None
+    
     async def discover_via_arp(self) -> List[NetworkNode]:
         """Discover devices via ARP table"""
+        if sys.platform.startswith("linux") or sys.platform == "win32":
+            # Native table reads are fast enough to run inline
+            return self._discover_arp_nodes()
+        return await asyncio.to_thread(self._discover_arp_nodes)
+    
+    def _discover_arp_nodes(self) -> List[NetworkNode]:
+        """Build nodes from the ARP table (blocking)"""
         nodes = []
         
         try:
-            # Get ARP table
-            result = await asyncio.to_thread(
-                subprocess.run,
-                ['arp', '-a'],
-                capture_output=True, text=True, timeout=10
-            )
+            if sys.platform.startswith("linux"):
+                entries = self._read_proc_arp()
+            elif sys.platform == "win32":
+                entries = self._read_win_arp()
+            else:
+                entries = self._read_arp_command()
             
-            # Parse ARP entries
-            for line in result.stdout.split('\n'):
-                # Match IP and MAC addresses
-                ip_match = re.search(r'(\d+\.\d+\.\d+\.\d+)', line)
-                mac_match = re.search(r'([0-9a-fA-F]{2}[:-]){5}[0-9a-fA-F]{2}', line)
+            # One timestamp for the whole scan
+            now_iso = datetime.now().isoformat()
+            for ip, mac in entries:
+                # Skip broadcast and special addresses
+                if ip.endswith('.255') or ip == '255.255.255.255':
+                    continue
                 
-                if ip_match:
-                    ip = ip_match.group(1)
-                    mac = mac_match.group(0) if mac_match else None
-                    
-                    # Skip broadcast and special addresses
-                    if ip.endswith('.255') or ip == '255.255.255.255':
-                        continue
-                    
-                    node_id = f"node_{ip.replace('.', '_')}"
-                    
-                    node = NetworkNode(
-                        id=node_id,
-                        ip=ip,
-                        mac=mac,
-                        is_gateway=(ip == self._gateway_ip),
-                        last_seen=datetime.now().isoformat()
-                    )
-                    
-                    # Detect vendor from MAC
-                    if mac:
-                        node.vendor = self._get_vendor_from_mac(mac)
-                    
-                    # Guess node type
-                    node.node_type = self._guess_node_type(node)
-                    
-                    nodes.append(node)
-                    self.nodes[node_id] = node
+                node = NetworkNode(
+                    id=f"node_{ip.replace('.', '_')}",
+                    ip=ip,
+                    mac=mac,
+                    is_gateway=(ip == self._gateway_ip),
+                    last_seen=now_iso
+                )
+                
+                # Detect vendor from MAC
+                if mac:
+                    node.vendor = self._get_vendor_from_mac(mac)
+                
+                # Guess node type
+                node.node_type = self._guess_node_type(node)
+                
+                nodes.append(node)
+                self._add_node(node)
             
         except Exception as e:
             print(f"ARP discovery error: {e}")
         
         return nodes
     
-    async def ping_sweep(self, subnet: str = None, start: int = 1, end: int = 254) -> List[NetworkNode]:
-        """Discover devices via ping sweep"""
-        if not subnet:
+    @staticmethod
+    def _read_proc_arp() -> List[tuple]:
+        """(ip, mac) pairs from the kernel neighbour table (Linux)"""
+        entries = []
+        with open("/proc/net/arp") as f:
+            # IP address  HW type  Flags  HW address  Mask  Device
+            for line in f.read().splitlines()[1:]:
+                fields = line.split()
+                if len(fields) < 4 or fields[2] == "0x0":
+                    continue  # incomplete entry
+                entries.append((fields[0], fields[3]))
+        return entries
+    
+    @staticmethod
+    def _read_win_arp() -> List[tuple]:
+        """(ip, mac) pairs from GetIpNetTable (Windows)"""
+        import ctypes
+        from ctypes import wintypes
+        
+        class MIB_IPNETROW(ctypes.Structure):
+            _fields_ = [
+                ("dwIndex", wintypes.DWORD),
+                ("dwPhysAddrLen", wintypes.DWORD),
+                ("bPhysAddr", ctypes.c_ubyte * 8),
+                ("dwAddr", wintypes.DWORD),
+                ("dwType", wintypes.DWORD),
+            ]
+        
+        get_table = ctypes.windll.iphlpapi.GetIpNetTable
+        size = wintypes.ULONG(0)
+        get_table(None, ctypes.byref(size), False)  # query buffer size
+        buf = ctypes.create_string_buffer(size.value)
+        if get_table(buf, ctypes.byref(size), False) != 0:
+            return []
+        
+        count = wintypes.DWORD.from_buffer(buf).value
+        rows = (MIB_IPNETROW * count).from_buffer(buf, ctypes.sizeof(wintypes.DWORD))
+        
+        entries = []
+        for row in rows:
+            if row.dwType == 2:  # MIB_IPNET_TYPE_INVALID
+                continue
+            ip = socket.inet_ntoa(struct.pack("<I", row.dwAddr))
+            mac = "-".join(f"{b:02x}" for b in row.bPhysAddr[:row.dwPhysAddrLen]) or None
+            entries.append((ip, mac))
+        return entries
+    
+    @staticmethod
+    def _read_arp_command() -> List[tuple]:
+        """(ip, mac) pairs parsed from `arp -a` (other platforms)"""
+        result = subprocess.run(
+            ['arp', '-a'],
+            capture_output=True, text=True, timeout=10
+        )
+        
+        entries = []
+        for line in result.stdout.split('\n'):
+            # Match IP and MAC addresses
+            ip_match = _IP_RE.search(line)
+            mac_match = _MAC_RE.search(line)
+            if ip_match:
+                entries.append((ip_match.group(1), mac_match.group(0) if mac_match else None))
+        return entries
+    
+    async def ping_sweep(self, subnet: str = None, start: int = 1, end: int = None,
+                         want: int = None) -> List[NetworkNode]:
+        """
+        Discover devices via ping sweep
+        
+        Args:
+            subnet: CIDR network ("10.0.0.0/22") or a /24 prefix ("192.168.1");
+                    defaults to the detected local network
+            start: First host to scan, 1-based within the network
+                   (the last octet on a /24)
+            end: Last host to scan (inclusive); defaults to
+                 MAX_SWEEP_HOSTS hosts from start
+            want: Stop as soon as this many hosts have answered
+        """
+        addresses = self.sweep_addresses(subnet, start, end)
+        if not addresses:
+            return []
+        
+        alive = None
+        if ICMPLIB_AVAILABLE:
+            alive = await self._icmp_sweep(addresses)
+        
+        if alive is not None:
+            discovered = []
+            now_iso = datetime.now().isoformat()
+            for ip in alive[:want]:
+                node = NetworkNode(
+                    id=f"node_{ip.replace('.', '_')}",
+                    ip=ip,
+                    is_gateway=(ip == self._gateway_ip),
+                    last_seen=now_iso
+                )
+                discovered.append(node)
+                self._add_node(node)
+            return discovered
+        
+        return await self._subprocess_sweep(addresses, want)
+    
+    def sweep_addresses(self, subnet: str = None, start: int = 1,
+                        end: int = None) -> List[str]:
+        """Addresses ping_sweep would probe for these arguments"""
+        if start < 1:
+            raise ValueError(f"start must be >= 1 (got {start})")
+        if end is None:
+            end = start - 1 + MAX_SWEEP_HOSTS
+        
+        if subnet:
+            network = ipaddress.ip_network(
+                subnet if "/" in subnet else f"{subnet}.0/24", strict=False
+            )
+        else:
             self._detect_local_network()
-            subnet = self._subnet
+            network = self._network
         
-        if not subnet:
+        if not network:
             return []
         
+        return [str(host) for host in islice(network.hosts(), start - 1, end)]
+    
+    async def _icmp_sweep(self, addresses: List[str]) -> Optional[List[str]]:
+        """
+        Ping all addresses from one ICMP socket pool (icmplib)
+        
+        Returns the live addresses, or None when ICMP sockets are not
+        permitted (unprivileged Linux without ping_group_range).
+        """
+        # Raw sockets need root on POSIX; Windows always uses them
+        privileged = not hasattr(os, "geteuid") or os.geteuid() == 0
+        try:
+            hosts = await async_multiping(
+                addresses, count=1, timeout=0.5,
+                concurrent_tasks=256, privileged=privileged
+            )
+        except ICMPLibError as e:
+            print(f"ICMP sweep unavailable, falling back to ping: {e}")
+            return None
+        
+        return [host.address for host in hosts if host.is_alive]
+    
+    async def _subprocess_sweep(self, addresses: List[str],
+                                want: int = None) -> List[NetworkNode]:
+        """Ping sweep via the system ping command (fallback)"""
         discovered = []
-        tasks = []
+        now_iso = datetime.now().isoformat()  # sweep start, shared by all nodes
         
         # Create ping tasks (limit concurrency)
         semaphore = asyncio.Semaphore(50)
@@ -210,64 +475,40 @@ class NetworkTopology:
                             id=node_id,
                             ip=ip,
                             is_gateway=(ip == self._gateway_ip),
-                            last_seen=datetime.now().isoformat()
+                            last_seen=now_iso
                         )
                         return node
                 except Exception:
                     pass
                 return None
         
-        # Create tasks for range
-        for i in range(start, min(end + 1, 255)):
-            ip = f"{subnet}.{i}"
-            tasks.append(ping_host(ip))
+        tasks = [asyncio.ensure_future(ping_host(ip)) for ip in addresses]
         
-        # Execute with timeout
+        # Collect replies as they arrive; on timeout or once `want` hosts
+        # answered, keep what was found and cancel the rest
         try:
-            results = await asyncio.wait_for(
-                asyncio.gather(*tasks, return_exceptions=True),
-                timeout=60
-            )
-            
-            for result in results:
-                if isinstance(result, NetworkNode):
+            for next_result in asyncio.as_completed(tasks, timeout=60):
+                result = await next_result
+                if result is not None:
                     discovered.append(result)
-                    self.nodes[result.id] = result
+                    self._add_node(result)
+                    if want and len(discovered) >= want:
+                        break
         except asyncio.TimeoutError:
             print("Ping sweep timed out")
+        finally:
+            for task in tasks:
+                task.cancel()
         
         return discovered
     
     def _get_vendor_from_mac(self, mac: str) -> Optional[str]:
         """Get vendor from MAC OUI (simplified)"""
-        # Common vendor prefixes
-        oui_map = {
-            "00:50:56": "VMware",
-            "00:0C:29": "VMware",
-            "08:00:27": "VirtualBox",
-            "52:54:00": "QEMU/KVM",
-            "B8:27:EB": "Raspberry Pi",
-            "DC:A6:32": "Raspberry Pi",
-            "00:1A:2B": "Cisco",
-            "00:1B:2B": "Cisco",
-            "00:1C:B3": "Cisco",
-            "00:22:55": "Cisco",
-            "4C:5E:0C": "Mikrotik",
-            "6C:3B:6B": "Mikrotik",
-            "00:0C:42": "Mikrotik",
-            "00:23:CD": "TP-Link",
-            "50:C7:BF": "TP-Link",
-            "00:1F:A4": "D-Link",
-            "00:26:5A": "D-Link",
-            "00:1E:58": "Ubiquiti",
-            "24:A4:3C": "Ubiquiti",
-            "FC:EC:DA": "Ubiquiti",
-        }
-        
-        mac_upper = mac.upper().replace('-', ':')
-        prefix = mac_upper[:8]
-        
-        return oui_map.get(prefix)
+        try:
+            oui = int(mac.replace(':', '').replace('-', '')[:6], 16)
+        except ValueError:
+            return None
+        return _OUI_VENDORS.get(oui)
     
     def _guess_node_type(self, node: NetworkNode) -> NodeType:
         """Guess node type based on available info"""
@@ -282,9 +523,8 @@ class NetworkTopology:
                 return NodeType.SERVER
         
         # Check common server ports
-        if node.ports_open:
-            if any(p in node.ports_open for p in [22, 80, 443, 3306, 5432]):
-                return NodeType.SERVER
+        if node.ports_mask & _SERVER_PORT_MASK:
+            return NodeType.SERVER
         
         return NodeType.UNKNOWN
     
@@ -292,12 +532,7 @@ class NetworkTopology:
         """Build links between nodes (assumes star topology from gateway)"""
         self.links.clear()
         
-        # Find gateway
-        gateway = None
-        for node in self.nodes.values():
-            if node.is_gateway:
-                gateway = node
-                break
+        gateway = self._gateway_node
         
         if gateway:
             # Connect all nodes to gateway
@@ -312,34 +547,20 @@ class NetworkTopology:
     
     def generate_mermaid(self) -> str:
         """Generate Mermaid diagram of topology"""
-        lines = ["graph TD"]
-        
-        # Add styling
-        lines.append("    classDef gateway fill:#e74c3c,stroke:#c0392b,color:white")
-        lines.append("    classDef router fill:#3498db,stroke:#2980b9,color:white")
-        lines.append("    classDef server fill:#2ecc71,stroke:#27ae60,color:white")
-        lines.append("    classDef workstation fill:#9b59b6,stroke:#8e44ad,color:white")
-        lines.append("    classDef unknown fill:#95a5a6,stroke:#7f8c8d,color:white")
+        lines = list(_MERMAID_HEADER)
         
         # Add nodes
-        for node in self.nodes.values():
-            label = node.hostname or node.ip
-            if node.vendor:
-                label += f"\\n({node.vendor})"
-            
-            # Node shape based on type
-            if node.node_type == NodeType.GATEWAY:
-                lines.append(f'    {node.id}["{label}"]:::gateway')
-            elif node.node_type == NodeType.ROUTER:
-                lines.append(f'    {node.id}{{"{label}"}}:::router')
-            elif node.node_type == NodeType.SERVER:
-                lines.append(f'    {node.id}[("{label}")]:::server')
-            else:
-                lines.append(f'    {node.id}["{label}"]:::unknown')
+        lines.extend(
+            _MERMAID_NODE.get(node.node_type, _MERMAID_NODE_DEFAULT).format(
+                id=node.id,
+                label=f"{node.hostname or node.ip}\\n({node.vendor})" if node.vendor
+                      else node.hostname or node.ip
+            )
+            for node in self.nodes.values()
+        )
         
         # Add links
-        for link in self.links:
-            lines.append(f"    {link.source_id} --- {link.target_id}")
+        lines.extend(f"    {link.source_id} --- {link.target_id}" for link in self.links)
         
         return "\n".join(lines)
     
@@ -353,14 +574,8 @@ class NetworkTopology:
         lines.append("NETWORK TOPOLOGY")
         lines.append("=" * 60)
         
-        # Find gateway
-        gateway = None
-        other_nodes = []
-        for node in self.nodes.values():
-            if node.is_gateway:
-                gateway = node
-            else:
-                other_nodes.append(node)
+        gateway = self._gateway_node
+        other_nodes = [node for node in self.nodes.values() if node is not gateway]
         
         if gateway:
             lines.append("")
@@ -380,17 +595,12 @@ class NetworkTopology:
                 # Add nodes in rows
                 for i in range(0, len(other_nodes), 5):
                     chunk = other_nodes[i:i+5]
-                    row = ""
-                    for node in chunk:
-                        icon = self._get_type_icon(node.node_type)
-                        row += f"[{icon}]  "
-                    lines.append("     " + row)
-                    
-                    row = ""
-                    for node in chunk:
-                        ip_short = ".".join(node.ip.split(".")[-2:])
-                        row += f"{ip_short:^6}"
-                    lines.append("     " + row)
+                    lines.append("     " + "".join(
+                        f"[{self._get_type_icon(node.node_type)}]  " for node in chunk
+                    ))
+                    lines.append("     " + "".join(
+                        f"{'.'.join(node.ip.split('.')[-2:]):^6}" for node in chunk
+                    ))
                     lines.append("")
         
         lines.append("=" * 60)
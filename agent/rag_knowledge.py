@@ -8,20 +8,32 @@ Uses ChromaDB for vector storage and retrieval of:
 - Configuration templates
 """
 import os
-from typing import List, Optional, Dict, Any
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, TYPE_CHECKING
 from dataclasses import dataclass
 
-from langchain_core.documents import Document
-from langchain_chroma import Chroma
-from langchain_core.embeddings import Embeddings
-from langchain_community.embeddings import OllamaEmbeddings
-
 from config import config
 
+# LangChain/Chroma are imported where first used: they are slow to import
+# and most processes (or memory recall, which only embeds) never need them
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+    from langchain_chroma import Chroma
+    from langchain_core.embeddings import Embeddings
+
 
 # Data directory for ChromaDB
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 CHROMA_DIR = os.path.join(DATA_DIR, "chroma_db")
+EMBED_CACHE_DIR = os.path.join(DATA_DIR, "emb_cache")
+
+# Recent query embeddings kept in memory (keyed by normalized query)
+QUERY_CACHE_SIZE = 256
+
+# Parallel embedding requests when adding documents in bulk
+EMBED_CONCURRENCY = 8
 
 
 @dataclass
@@ -33,8 +45,10 @@ class KnowledgeEntry:
     tags: List[str]
     source: str = "manual"
     
-    def to_document(self) -> Document:
+    def to_document(self) -> "Document":
         """Convert to LangChain Document"""
+        from langchain_core.documents import Document
+        
         return Document(
             page_content=f"# {self.title}\n\n{self.content}",
             metadata={
@@ -70,19 +84,69 @@ class NetworkKnowledgeBase:
         self._embeddings = None
         self._vectorstore = None
         self._initialized = False
+        self._query_cache: OrderedDict = OrderedDict()
+        self._categories: Optional[set] = None  # loaded on first list_categories()
     
-    def _get_embeddings(self) -> Embeddings:
-        """Get or create embeddings model"""
+    def _get_embeddings(self) -> "Embeddings":
+        """Get or create embeddings model (disk-cached per model when available)"""
         if self._embeddings is None:
-            self._embeddings = OllamaEmbeddings(
+            from langchain_community.embeddings import OllamaEmbeddings
+            
+            embeddings = OllamaEmbeddings(
                 model=config.OLLAMA_MODEL,
                 base_url=config.OLLAMA_HOST
             )
+            try:
+                from langchain.embeddings import CacheBackedEmbeddings
+                from langchain.storage import LocalFileStore
+                
+                store = LocalFileStore(EMBED_CACHE_DIR)
+                cache_kwargs = {"namespace": config.OLLAMA_MODEL, "query_embedding_cache": True}
+                try:
+                    # blake2b keys hash faster than the default SHA-1
+                    embeddings = CacheBackedEmbeddings.from_bytes_store(
+                        embeddings, store, key_encoder="blake2b", **cache_kwargs
+                    )
+                except TypeError:  # older langchain without key_encoder
+                    embeddings = CacheBackedEmbeddings.from_bytes_store(
+                        embeddings, store, **cache_kwargs
+                    )
+            except Exception as e:
+                print(f"Embedding cache unavailable: {e}")
+            self._embeddings = embeddings
         return self._embeddings
     
-    def _get_vectorstore(self) -> Chroma:
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing recent embeddings of the same normalized text
+        
+        The normalized form is only the cache key; the model sees the original text.
+        """
+        key = " ".join(text.lower().split())
+        vector = self._query_cache.get(key)
+        if vector is not None:
+            self._query_cache.move_to_end(key)
+            return vector
+        
+        vector = self._get_embeddings().embed_query(text)
+        self._query_cache[key] = vector
+        if len(self._query_cache) > QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+        return vector
+    
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents concurrently (OllamaEmbeddings sends one request per text)"""
+        embeddings = self._get_embeddings()
+        if len(texts) <= 1:
+            return embeddings.embed_documents(texts)
+        
+        with ThreadPoolExecutor(max_workers=min(EMBED_CONCURRENCY, len(texts))) as pool:
+            return list(pool.map(lambda text: embeddings.embed_documents([text])[0], texts))
+    
+    def _get_vectorstore(self) -> "Chroma":
         """Get or create ChromaDB vectorstore"""
         if self._vectorstore is None:
+            from langchain_chroma import Chroma
+            
             self._vectorstore = Chroma(
                 collection_name="network_knowledge",
                 embedding_function=self._get_embeddings(),
@@ -114,6 +178,8 @@ class NetworkKnowledgeBase:
         doc = entry.to_document()
         vectorstore = self._get_vectorstore()
         ids = vectorstore.add_documents([doc])
+        if self._categories is not None:
+            self._categories.add(category)
         
         return ids[0] if ids else None
     
@@ -137,10 +203,26 @@ class NetworkKnowledgeBase:
             )
             docs.append(entry.to_document())
         
+        if not docs:
+            return []
+        
+        # Embed all documents up front, then write them in one collection call
+        texts = [doc.page_content for doc in docs]
+        vectors = self._embed_documents(texts)
+        ids = [str(uuid.uuid4()) for _ in docs]
+        
         vectorstore = self._get_vectorstore()
-        return vectorstore.add_documents(docs)
+        vectorstore._collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=texts,
+            metadatas=[doc.metadata for doc in docs]
+        )
+        if self._categories is not None:
+            self._categories.update(doc.metadata["category"] for doc in docs)
+        return ids
     
-    def search(self, query: str, k: int = 3, category: str = None) -> List[Document]:
+    def search(self, query: str, k: int = 3, category: str = None) -> List["Document"]:
         """
         Search for relevant documents
         
@@ -153,15 +235,16 @@ class NetworkKnowledgeBase:
             List of relevant documents
         """
         vectorstore = self._get_vectorstore()
+        embedding = self.embed_query(query)
         
         if category:
-            results = vectorstore.similarity_search(
-                query,
+            results = vectorstore.similarity_search_by_vector(
+                embedding,
                 k=k,
                 filter={"category": category}
             )
         else:
-            results = vectorstore.similarity_search(query, k=k)
+            results = vectorstore.similarity_search_by_vector(embedding, k=k)
         
         return results
     
@@ -177,7 +260,9 @@ class NetworkKnowledgeBase:
             List of (document, score) tuples
         """
         vectorstore = self._get_vectorstore()
-        return vectorstore.similarity_search_with_score(query, k=k)
+        return vectorstore.similarity_search_by_vector_with_relevance_scores(
+            self.embed_query(query), k=k
+        )
     
     def get_context_for_query(self, query: str, k: int = 3) -> str:
         """
@@ -203,19 +288,22 @@ class NetworkKnowledgeBase:
         return "\n".join(context_parts)
     
     def list_categories(self) -> List[str]:
-        """Get all unique categories"""
-        vectorstore = self._get_vectorstore()
-        collection = vectorstore._collection
-        
-        # Get all metadata
-        results = collection.get(include=["metadatas"])
-        categories = set()
-        
-        for meta in results.get("metadatas", []):
-            if meta and "category" in meta:
-                categories.add(meta["category"])
+        """Get all unique categories (scanned once, then kept up to date)"""
+        if self._categories is None:
+            vectorstore = self._get_vectorstore()
+            collection = vectorstore._collection
+            
+            # Get all metadata
+            results = collection.get(include=["metadatas"])
+            categories = set()
+            
+            for meta in results.get("metadatas", []):
+                if meta and "category" in meta:
+                    categories.add(meta["category"])
+            
+            self._categories = categories
         
-        return list(categories)
+        return list(self._categories)
     
     def count_documents(self) -> int:
         """Get total number of documents"""
@@ -227,6 +315,8 @@ class NetworkKnowledgeBase:
         vectorstore = self._get_vectorstore()
         try:
             vectorstore.delete([doc_id])
+            # The deleted doc may have been its category's last one - rescan lazily
+            self._categories = None
             return True
         except Exception:
             return False
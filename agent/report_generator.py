@@ -167,8 +167,7 @@ _Report generated by NetOps Sentinel Agent_
         now = datetime.now()
         
         # Get config backup info
-        config_versions = config_backup.get_versions(device_id)
-        latest_config = config_backup.get_latest_version(device_id)
+        config_versions = config_backup.get_versions(device_id, include_content=False)
         
         # Get last health check
         last_check = scheduler.get_last_result(device_id)
@@ -297,13 +296,13 @@ _Device report generated by NetOps Sentinel Agent_
     def generate_weekly_summary(self) -> str:
         """Generate a weekly summary report"""
         from agent.alerts import alert_manager
-        from agent.long_term_memory import long_term_memory
+        from agent.long_term_memory import get_long_term_memory
         
         now = datetime.now()
         week_ago = now - timedelta(days=7)
         
         # Get memory stats
-        memory_stats = long_term_memory.get_memory_stats()
+        memory_stats = get_long_term_memory().get_memory_stats()
         
         # Get alert summary
         alert_summary = alert_manager.get_summary()
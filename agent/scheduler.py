@@ -8,13 +8,22 @@ Automated scheduled monitoring for infrastructure devices:
 - Background monitoring loop
 """
 import asyncio
+import os
+import re
 from typing import Dict, List, Optional, Callable
 from datetime import datetime
 import time
-import socket
 import subprocess
+from collections import OrderedDict
 import platform
 
+try:
+    from icmplib import async_ping, async_multiping
+    from icmplib.exceptions import ICMPLibError, SocketPermissionError
+    ICMPLIB_AVAILABLE = True
+except ImportError:
+    ICMPLIB_AVAILABLE = False
+
 from agent.infrastructure import (
     infrastructure, 
     NetworkDevice, 
@@ -22,6 +31,45 @@ from agent.infrastructure import (
     HealthCheckResult
 )
 
+# Upper bound on devices checked at once (each check opens 1 + N ports sockets)
+MAX_CONCURRENT_CHECKS = 50
+
+# Upper bound on individual probes in flight during check_all_now
+MAX_CONCURRENT_PROBES = 100
+
+# Global cap on simultaneously open TCP probe sockets (all code paths)
+MAX_OPEN_SOCKETS = 256
+
+_IS_WINDOWS = platform.system().lower() == 'windows'
+
+# Raw ICMP sockets need root on POSIX; Windows always uses them
+_ICMP_PRIVILEGED = not hasattr(os, "geteuid") or os.geteuid() == 0
+
+# Hard cap on stored last results (LRU) in case pruning lags behind device churn
+MAX_STORED_RESULTS = 1024
+
+# Ping/port results are reused for min(check interval, this) seconds
+PROBE_CACHE_TTL = 10
+
+# Device loops are resynced on inventory changes; this is only a safety net
+DEVICE_SYNC_INTERVAL = 60
+
+# Ports probed concurrently when ICMP is blocked
+TCP_PING_PORTS = (80, 443, 22)
+
+# Latency in ping output - Windows: "time=1ms" / "time<1ms", Linux: "time=1.23 ms"
+_PING_TIME_RE = re.compile(r'time[=<](\d+\.?\d*)\s*ms')
+
+
+def _as_async(callback: Optional[Callable]) -> Optional[Callable]:
+    """Wrap a sync callback in a coroutine function so callers can always await it"""
+    if callback is None or asyncio.iscoroutinefunction(callback):
+        return callback
+    
+    async def _call(*args, **kwargs):
+        return callback(*args, **kwargs)
+    return _call
+
 
 class MonitoringScheduler:
     """
@@ -37,22 +85,33 @@ class MonitoringScheduler:
     def __init__(self):
         self._running = False
         self._task: Optional[asyncio.Task] = None
+        self._device_tasks: Dict[str, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._devices_changed: Optional[asyncio.Event] = None  # created in start() on the running loop
         self._alert_callback: Optional[Callable] = None
         self._status_callback: Optional[Callable] = None
-        self._check_results: Dict[str, HealthCheckResult] = {}
+        self._check_results: "OrderedDict[str, HealthCheckResult]" = OrderedDict()
         self._min_interval = 10  # Minimum check interval
+        self._check_semaphore: Optional[asyncio.Semaphore] = None  # created in start()
+        self._socket_semaphore: Optional[asyncio.Semaphore] = None  # see _sockets()
+        self._socket_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ping_cache: Dict[str, tuple] = {}  # host -> (expiry, ping result)
+        self._port_cache: Dict[tuple, tuple] = {}  # (host, port) -> (expiry, is_open)
+        self._inflight_probes: Dict[tuple, asyncio.Future] = {}
+        self._notify_tasks: set = set()  # strong refs to running notification tasks
+        self._icmplib_usable = ICMPLIB_AVAILABLE
     
     @property
     def is_running(self) -> bool:
         return self._running
     
     def set_alert_callback(self, callback: Callable):
-        """Set callback for alerts (device down, etc.)"""
-        self._alert_callback = callback
+        """Set callback for alerts (device down, etc.) - sync or async"""
+        self._alert_callback = _as_async(callback)
     
     def set_status_callback(self, callback: Callable):
-        """Set callback for status updates"""
-        self._status_callback = callback
+        """Set callback for status updates - sync or async"""
+        self._status_callback = _as_async(callback)
     
     async def start(self):
         """Start the monitoring scheduler"""
@@ -60,6 +119,9 @@ class MonitoringScheduler:
             return
         
         self._running = True
+        self._loop = asyncio.get_running_loop()
+        self._devices_changed = asyncio.Event()
+        self._check_semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHECKS)
         self._task = asyncio.create_task(self._monitoring_loop())
         print("🔄 Monitoring scheduler started")
     
@@ -75,26 +137,61 @@ class MonitoringScheduler:
         print("⏹️ Monitoring scheduler stopped")
     
     async def _monitoring_loop(self):
-        """Main monitoring loop"""
-        last_check: Dict[str, float] = {}
-        
-        while self._running:
-            now = time.time()
-            
-            # Get all enabled devices
-            devices = [d for d in infrastructure.list_devices() if d.enabled]
-            
-            for device in devices:
-                last = last_check.get(device.id, 0)
-                interval = max(device.check_interval_seconds, self._min_interval)
+        """Main monitoring loop - keeps one self-scheduling task per enabled device"""
+        try:
+            while self._running:
+                self._prune_results(infrastructure.list_devices())
+                enabled = {d.id: d for d in infrastructure.list_enabled_devices()}
                 
-                if now - last >= interval:
-                    # Time to check this device
-                    asyncio.create_task(self._check_device(device))
-                    last_check[device.id] = now
-            
-            # Sleep for a bit before next iteration
-            await asyncio.sleep(5)
+                # Stop loops for removed or disabled devices
+                for device_id in list(self._device_tasks):
+                    if device_id not in enabled or self._device_tasks[device_id].done():
+                        self._device_tasks.pop(device_id).cancel()
+                
+                # Start loops for new devices
+                for device_id, device in enabled.items():
+                    if device_id not in self._device_tasks:
+                        self._device_tasks[device_id] = asyncio.create_task(
+                            self._device_loop(device)
+                        )
+                
+                # Sleep until the inventory changes (or the safety-net resync)
+                try:
+                    await asyncio.wait_for(self._devices_changed.wait(), DEVICE_SYNC_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._devices_changed.clear()
+        finally:
+            for task in self._device_tasks.values():
+                task.cancel()
+            self._device_tasks.clear()
+    
+    def _on_devices_changed(self):
+        """Infrastructure change listener - wakes the supervisor loop"""
+        loop = self._loop
+        event = self._devices_changed
+        if loop is None or event is None or loop.is_closed():
+            return  # not started - nothing to wake
+        try:
+            same_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            same_loop = False
+        if same_loop:
+            event.set()
+        else:
+            # Sync tools may edit the inventory from worker threads
+            loop.call_soon_threadsafe(event.set)
+    
+    async def _device_loop(self, device: NetworkDevice):
+        """Check a device, then sleep until its own next interval"""
+        while self._running:
+            await self._check_device_limited(device)
+            await asyncio.sleep(max(device.check_interval_seconds, self._min_interval))
+    
+    async def _check_device_limited(self, device: NetworkDevice):
+        """Run _check_device while holding a concurrency slot"""
+        async with self._check_semaphore:
+            await self._check_device(device)
     
     async def _check_device(self, device: NetworkDevice):
         """Perform health check on a single device"""
@@ -103,74 +200,94 @@ class MonitoringScheduler:
         try:
             result = await self._perform_health_check(device)
             device.update_status(result)
-            self._check_results[device.id] = result
+            self._store_result(device.id, result)
             
-            # Notify status callback
+            # Status callback and status-change alert are independent - run both at once
+            notifications = []
             if self._status_callback:
-                try:
-                    if asyncio.iscoroutinefunction(self._status_callback):
-                        await self._status_callback(device, result)
-                    else:
-                        self._status_callback(device, result)
-                except Exception:
-                    pass
+                notifications.append(self._status_callback(device, result))
+            
+            alert = self._status_change_alert(device, old_status)
+            if alert and self._alert_callback:
+                notifications.append(self._alert_callback(device, *alert))
             
-            # Check for status change - trigger alert
-            if old_status != device.status:
-                if device.status == DeviceStatus.OFFLINE and self._alert_callback:
-                    await self._trigger_alert(
-                        device, 
-                        "critical",
-                        f"Device {device.name} ({device.ip}) is OFFLINE"
-                    )
-                elif device.status == DeviceStatus.DEGRADED and self._alert_callback:
-                    await self._trigger_alert(
-                        device,
-                        "warning", 
-                        f"Device {device.name} ({device.ip}) is DEGRADED - some ports closed"
-                    )
-                elif device.status == DeviceStatus.ONLINE and old_status == DeviceStatus.OFFLINE:
-                    await self._trigger_alert(
-                        device,
-                        "info",
-                        f"Device {device.name} ({device.ip}) is back ONLINE"
-                    )
+            # Fire and forget: slow sinks (webhooks, SMTP) must not hold the check slot
+            if notifications:
+                task = asyncio.create_task(self._notify(device, notifications))
+                self._notify_tasks.add(task)
+                task.add_done_callback(self._notify_tasks.discard)
                     
         except Exception as e:
             print(f"❌ Error checking device {device.name}: {e}")
     
+    async def _notify(self, device: NetworkDevice, notifications: list):
+        """Run notification callbacks, reporting (not raising) their errors"""
+        outcomes = await asyncio.gather(*notifications, return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                print(f"Notification callback error for {device.name}: {outcome!r}")
+    
+    def _status_change_alert(self, device: NetworkDevice, old_status: DeviceStatus) -> Optional[tuple]:
+        """(severity, message) to alert on for a status transition, or None"""
+        if old_status == device.status:
+            return None
+        if device.status == DeviceStatus.OFFLINE:
+            return "critical", f"Device {device.name} ({device.ip}) is OFFLINE"
+        if device.status == DeviceStatus.DEGRADED:
+            return "warning", f"Device {device.name} ({device.ip}) is DEGRADED - some ports closed"
+        if device.status == DeviceStatus.ONLINE and old_status == DeviceStatus.OFFLINE:
+            return "info", f"Device {device.name} ({device.ip}) is back ONLINE"
+        return None
+    
     async def _perform_health_check(self, device: NetworkDevice) -> HealthCheckResult:
         """Perform actual health check"""
         timestamp = datetime.now().isoformat()
         
-        # Ping check
-        ping_ok, latency = await self._ping(device.ip)
+        # A failed ping means OFFLINE whatever the ports say, so port probes are
+        # skipped (cached failure) or abandoned (fresh failure) and reported closed.
+        # Hosts that block ICMP are still reached through _ping's TCP fallback.
+        offline_ports = [False] * len(device.ports_to_monitor)
+        cached = self._ping_cache.get(device.ip)
+        if cached and time.monotonic() < cached[0] and not cached[1][0]:
+            return self._build_result(device, timestamp, cached[1], offline_ports)
+        
+        # Otherwise ping and port checks run concurrently
+        ttl = self._probe_ttl(device)
+        ping_task = asyncio.ensure_future(self._cached_ping(device.ip, ttl))
+        port_tasks = [
+            asyncio.ensure_future(self._cached_check_port(device.ip, p, ttl))
+            for p in device.ports_to_monitor
+        ]
+        try:
+            ping_result = await ping_task
+            if not ping_result[0]:
+                return self._build_result(device, timestamp, ping_result, offline_ports)
+            port_results = await asyncio.gather(*port_tasks)
+        finally:
+            for task in [ping_task, *port_tasks]:
+                task.cancel()  # no-op for finished tasks
+        return self._build_result(device, timestamp, ping_result, port_results)
+    
+    def _build_result(self, device: NetworkDevice, timestamp: str,
+                      ping_result: tuple, port_results: List[bool]) -> HealthCheckResult:
+        """Combine ping and per-port probe outcomes into a HealthCheckResult"""
+        ping_ok, latency = ping_result
         
-        # Port checks
         ports_open = []
         ports_closed = []
         
-        for port in device.ports_to_monitor:
-            is_open = await self._check_port(device.ip, port)
+        for port, is_open in zip(device.ports_to_monitor, port_results):
             if is_open:
                 ports_open.append(port)
             else:
                 ports_closed.append(port)
         
-        # Determine status
+        # Determine status: unreachable -> OFFLINE, reachable with any monitored
+        # port closed -> DEGRADED, otherwise (incl. no ports monitored) ONLINE
         if not ping_ok:
             status = DeviceStatus.OFFLINE
-        elif not device.ports_to_monitor:
-            # No ports to monitor - ping success is enough
-            status = DeviceStatus.ONLINE
-        elif ports_closed:
-            # Some or all ports are closed, but device is pingable
-            if len(ports_closed) == len(device.ports_to_monitor):
-                status = DeviceStatus.DEGRADED  # Reachable but no monitored services
-            else:
-                status = DeviceStatus.DEGRADED
         else:
-            status = DeviceStatus.ONLINE
+            status = DeviceStatus.DEGRADED if ports_closed else DeviceStatus.ONLINE
         
         return HealthCheckResult(
             device_id=device.id,
@@ -183,6 +300,46 @@ class MonitoringScheduler:
             status=status
         )
     
+    def _probe_ttl(self, device: NetworkDevice) -> float:
+        """How long a probe result for this device may be reused"""
+        return min(device.check_interval_seconds, PROBE_CACHE_TTL)
+    
+    async def _cached(self, cache: dict, key, ttl: float, probe: Callable):
+        """Return a probe result memoized for ttl seconds (monotonic clock)
+        
+        Concurrent callers for the same key share one in-flight probe, so
+        overlapping checks never stack duplicate probes on a stalled host.
+        """
+        entry = cache.get(key)
+        if entry and time.monotonic() < entry[0]:
+            return entry[1]
+        
+        inflight_key = (id(cache), key)
+        future = self._inflight_probes.get(inflight_key)
+        if future is None:
+            future = asyncio.ensure_future(probe())
+            self._inflight_probes[inflight_key] = future
+            future.add_done_callback(lambda _: self._inflight_probes.pop(inflight_key, None))
+        
+        # shield: one caller being cancelled must not cancel the shared probe
+        result = await asyncio.shield(future)
+        cache[key] = (time.monotonic() + ttl, result)
+        return result
+    
+    async def _cached_ping(self, host: str, ttl: float) -> tuple:
+        return await self._cached(self._ping_cache, host, ttl, lambda: self._ping(host))
+    
+    async def _cached_check_port(self, host: str, port: int, ttl: float) -> bool:
+        return await self._cached(
+            self._port_cache, (host, port), ttl, lambda: self._check_port(host, port)
+        )
+    
+    def _forget_probes(self, host: str):
+        """Drop cached probe results for a host"""
+        self._ping_cache.pop(host, None)
+        for key in [k for k in self._port_cache if k[0] == host]:
+            del self._port_cache[key]
+    
     async def _ping(self, host: str, timeout: float = 3.0) -> tuple:
         """Ping check using real ICMP ping first, then TCP fallback"""
         # Try real ICMP ping first
@@ -193,49 +350,91 @@ class MonitoringScheduler:
         except Exception:
             pass
         
-        # Fallback to TCP port probing (for hosts that block ICMP)
-        for port in [80, 443, 22]:
-            try:
-                start = time.time()
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(timeout)
-                result = await asyncio.to_thread(
-                    sock.connect_ex, (host, port)
+        return await self._tcp_ping(host, timeout)
+    
+    async def _tcp_ping(self, host: str, timeout: float = 3.0) -> tuple:
+        """Reachability via TCP (for hosts that block ICMP)
+        
+        Probes all TCP_PING_PORTS at once and takes the first successful connect.
+        """
+        tasks = [
+            asyncio.create_task(self._tcp_connect(host, port, timeout))
+            for port in TCP_PING_PORTS
+        ]
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
                 )
-                latency = (time.time() - start) * 1000
-                sock.close()
-                
-                if result == 0:
-                    return True, latency
-            except Exception:
-                continue
+                for task in done:
+                    if not task.exception():
+                        return True, task.result()
+        finally:
+            for task in pending:
+                task.cancel()
         
         return False, -1
     
+    def _sockets(self) -> asyncio.Semaphore:
+        """Socket cap bound to the running loop (check_now works without start())"""
+        loop = asyncio.get_running_loop()
+        if self._socket_semaphore is None or self._socket_loop is not loop:
+            self._socket_semaphore = asyncio.Semaphore(MAX_OPEN_SOCKETS)
+            self._socket_loop = loop
+        return self._socket_semaphore
+    
+    async def _tcp_connect(self, host: str, port: int, timeout: float) -> float:
+        """Open and close a TCP connection, returning the connect time in ms"""
+        async with self._sockets():
+            start = time.perf_counter()
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port), timeout
+            )
+            latency = (time.perf_counter() - start) * 1000
+            writer.close()
+            try:
+                await writer.wait_closed()  # release the socket now, not at GC
+            except OSError:
+                pass
+            return latency
+    
     async def _icmp_ping(self, host: str, timeout: float = 3.0) -> tuple:
-        """Real ICMP ping using system ping command (thread-safe for uvicorn)"""
-        import re
+        """Real ICMP ping via icmplib, or the system ping command (thread-safe for uvicorn)"""
+        if self._icmplib_usable:
+            try:
+                result = await async_ping(
+                    host, count=1, timeout=timeout, privileged=_ICMP_PRIVILEGED
+                )
+                if result.is_alive:
+                    return True, result.avg_rtt
+                return False, -1
+            except SocketPermissionError as e:
+                # Not permitted here - stop trying and use the ping command
+                print(f"icmplib unavailable, falling back to ping command: {e}")
+                self._icmplib_usable = False
+            except ICMPLibError:
+                return False, -1
         
         def _do_ping():
             try:
-                param = '-n' if platform.system().lower() == 'windows' else '-c'
-                timeout_param = '-w' if platform.system().lower() == 'windows' else '-W'
-                timeout_val = str(int(timeout * 1000)) if platform.system().lower() == 'windows' else str(int(timeout))
+                if _IS_WINDOWS:
+                    cmd = ['ping', '-n', '1', '-w', str(int(timeout * 1000)), host]
+                else:
+                    cmd = ['ping', '-c', '1', '-W', str(int(timeout)), host]
                 
-                start = time.time()
+                start = time.perf_counter()
                 result = subprocess.run(
-                    ['ping', param, '1', timeout_param, timeout_val, host],
+                    cmd,
                     capture_output=True,
                     text=True,
                     timeout=timeout + 2
                 )
-                elapsed = (time.time() - start) * 1000
+                elapsed = (time.perf_counter() - start) * 1000
                 
                 if result.returncode == 0:
                     # Parse actual latency from output
-                    # Windows: "time=1ms" or "time<1ms"
-                    # Linux: "time=1.23 ms"
-                    match = re.search(r'time[=<](\d+\.?\d*)\s*ms', result.stdout)
+                    match = _PING_TIME_RE.search(result.stdout)
                     if match:
                         elapsed = float(match.group(1))
                     return True, elapsed
@@ -249,66 +448,143 @@ class MonitoringScheduler:
     async def _check_port(self, host: str, port: int, timeout: float = 2.0) -> bool:
         """Check if a specific port is open"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            result = await asyncio.to_thread(
-                sock.connect_ex, (host, port)
-            )
-            sock.close()
-            return result == 0
-        except Exception:
+            await self._tcp_connect(host, port, timeout)
+            return True
+        except (asyncio.TimeoutError, OSError):
             return False
     
-    async def _trigger_alert(self, device: NetworkDevice, severity: str, message: str):
-        """Trigger an alert"""
-        if self._alert_callback:
-            try:
-                if asyncio.iscoroutinefunction(self._alert_callback):
-                    await self._alert_callback(device, severity, message)
-                else:
-                    self._alert_callback(device, severity, message)
-            except Exception as e:
-                print(f"Alert callback error: {e}")
+    async def _batch_icmp(self, hosts: List[str], timeout: float = 3.0) -> Dict[str, tuple]:
+        """
+        ICMP-ping many hosts from one icmplib socket pool
+        
+        Returns {host: (alive, latency_ms)}, or {} when icmplib is unusable.
+        """
+        if not self._icmplib_usable or not hosts:
+            return {}
+        
+        try:
+            replies = await async_multiping(
+                hosts, count=1, timeout=timeout,
+                concurrent_tasks=min(len(hosts), MAX_OPEN_SOCKETS),
+                privileged=_ICMP_PRIVILEGED
+            )
+        except SocketPermissionError as e:
+            print(f"icmplib unavailable, falling back to ping command: {e}")
+            self._icmplib_usable = False
+            return {}
+        except ICMPLibError:
+            return {}
+        
+        # Replies come back in input order
+        return {
+            host: (reply.is_alive, reply.avg_rtt if reply.is_alive else -1)
+            for host, reply in zip(hosts, replies)
+        }
     
-    async def check_now(self, device_id: str) -> Optional[HealthCheckResult]:
-        """Immediately check a specific device"""
+    async def check_now(self, device_id: str, force: bool = False) -> Optional[HealthCheckResult]:
+        """Immediately check a specific device (force=True skips cached probe results)"""
         device = infrastructure.get_device(device_id)
         if not device:
             return None
         
+        if force:
+            self._forget_probes(device.ip)
+        
         result = await self._perform_health_check(device)
         device.update_status(result)
-        self._check_results[device_id] = result
+        self._store_result(device_id, result)
         
         return result
     
     async def check_all_now(self) -> Dict[str, HealthCheckResult]:
-        """Check all devices immediately"""
-        results = {}
-        devices = infrastructure.list_devices()
+        """Check all devices immediately
+        
+        Every ping and (device, port) probe is issued in one bounded batch,
+        so a slow host doesn't hold up the probes of other devices.
+        """
+        timestamp = datetime.now().isoformat()
+        self._prune_results(infrastructure.list_devices())
+        devices = infrastructure.list_enabled_devices()
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROBES)
+        
+        # One ICMP sweep for every host without a fresh cached ping, running
+        # alongside the port probes (only ping probes wait for it)
+        now = time.monotonic()
+        stale_hosts = sorted({
+            d.ip for d in devices
+            if not (d.ip in self._ping_cache and now < self._ping_cache[d.ip][0])
+        })
+        icmp_sweep = asyncio.ensure_future(self._batch_icmp(stale_hosts))
         
-        tasks = []
+        async def run_probe(device: NetworkDevice, port: Optional[int]):
+            if port is None:
+                icmp = await icmp_sweep
+            async with semaphore:
+                ttl = self._probe_ttl(device)
+                if port is not None:
+                    return await self._cached_check_port(device.ip, port, ttl)
+                if device.ip not in icmp:
+                    return await self._cached_ping(device.ip, ttl)
+                
+                # Already ICMP-pinged above; only silent hosts need the TCP fallback
+                ping = icmp[device.ip]
+                if not ping[0]:
+                    ping = await self._tcp_ping(device.ip)
+                self._ping_cache[device.ip] = (time.monotonic() + ttl, ping)
+                return ping
+        
+        # port None = ping probe
+        probes = [(device, None) for device in devices]
+        probes += [(device, port) for device in devices for port in device.ports_to_monitor]
+        outcomes = await asyncio.gather(*[run_probe(d, port) for d, port in probes])
+        
+        # Group outcomes back per device
+        pings: Dict[str, tuple] = {}
+        ports: Dict[str, Dict[int, bool]] = {device.id: {} for device in devices}
+        for (device, port), outcome in zip(probes, outcomes):
+            if port is None:
+                pings[device.id] = outcome
+            else:
+                ports[device.id][port] = outcome
+        
+        results = {}
         for device in devices:
-            if device.enabled:
-                tasks.append(self._check_and_store(device))
+            port_results = [ports[device.id][p] for p in device.ports_to_monitor]
+            result = self._build_result(device, timestamp, pings[device.id], port_results)
+            device.update_status(result)
+            self._store_result(device.id, result)
+            results[device.id] = result
         
-        await asyncio.gather(*tasks)
-        return self._check_results.copy()
+        return results
     
-    async def _check_and_store(self, device: NetworkDevice):
-        """Check device and store result"""
-        result = await self._perform_health_check(device)
-        device.update_status(result)
-        self._check_results[device.id] = result
+    def _store_result(self, device_id: str, result: HealthCheckResult):
+        """Record a device's latest result, evicting the least recently updated past the cap"""
+        self._check_results[device_id] = result
+        self._check_results.move_to_end(device_id)
+        while len(self._check_results) > MAX_STORED_RESULTS:
+            self._check_results.popitem(last=False)
+    
+    def _prune_results(self, devices: List[NetworkDevice]):
+        """Forget results of devices that are no longer registered"""
+        known = {d.id for d in devices}
+        for device_id in [i for i in self._check_results if i not in known]:
+            del self._check_results[device_id]
+        
+        # Expired probe results are never reused - drop them too
+        now = time.monotonic()
+        for cache in (self._ping_cache, self._port_cache):
+            for key in [k for k, (expiry, _) in cache.items() if expiry <= now]:
+                del cache[key]
     
     def get_last_result(self, device_id: str) -> Optional[HealthCheckResult]:
         """Get last check result for a device"""
         return self._check_results.get(device_id)
     
     def get_all_results(self) -> Dict[str, HealthCheckResult]:
-        """Get all last check results"""
-        return self._check_results.copy()
+        """Get all last check results (snapshot - safe to iterate from tool threads)"""
+        return dict(self._check_results)
 
 
 # Singleton instance
 scheduler = MonitoringScheduler()
+infrastructure.register_change_listener(scheduler._on_devices_changed)
@@ -17,6 +17,8 @@ class Config:
     # Ollama Settings
     OLLAMA_HOST: str = os.getenv("OLLAMA_HOST", "http://localhost:11434")
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "DEFAULT_MODEL")
+    # How long Ollama keeps the model (and its prompt KV cache) loaded
+    OLLAMA_KEEP_ALIVE: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
     
     # OpenAI Settings
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
@@ -32,6 +34,15 @@ class Config:
     LLM_FALLBACK_ENABLED: bool = os.getenv("LLM_FALLBACK_ENABLED", "true").lower() == "true"
     LLM_FALLBACK_PROVIDER: str = os.getenv("LLM_FALLBACK_PROVIDER", "ollama")
     
+    # Sampling temperature for the agent LLM
+    LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+    
+    # Response cache: identical prompts (same model, tools and messages)
+    # are answered from SQLite instead of calling the provider again.
+    # Only deterministic models (temperature 0) are cached.
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "data/llm_cache.db")
+    
     # Available LLM Models (for UI model selector)
     AVAILABLE_MODELS = {
         "gpt-oss:20b": {
@@ -78,6 +89,10 @@ class Config:
     PORT: int = int(os.getenv("PORT", "8000"))
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
     
+    # Memory Settings
+    # Embed saved solutions (via the RAG embeddings model) for hybrid recall
+    MEMORY_SEMANTIC_RECALL: bool = os.getenv("MEMORY_SEMANTIC_RECALL", "false").lower() == "true"
+    
     # Agent Settings
     MAX_REASONING_STEPS: int = 10
     RISK_THRESHOLD: float = 0.7  # Block actions above this risk level
@@ -7,13 +7,27 @@ Implements:
 - Human-in-the-Loop approval workflow
 - Max iteration limits
 """
-import asyncio
 import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Set
 from enum import Enum
-from datetime import datetime
-import json
+from datetime import datetime, timedelta
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+
+# Bounds on in-memory guardrail state (oldest entries are evicted first)
+MAX_PENDING_PLANS = 1024
+PENDING_PLAN_TTL = 3600  # seconds a plan stays approvable
+MAX_TRACKED_SESSIONS = 4096
 
 
 class RiskLevel(Enum):
@@ -23,6 +37,23 @@ class RiskLevel(Enum):
     MEDIUM = "medium"       # Reversible changes
     HIGH = "high"           # Significant changes
     CRITICAL = "critical"   # Potentially destructive
+    
+    @property
+    def rank(self) -> int:
+        """Severity ordinal (INFO=0 ... CRITICAL=4) for comparing levels"""
+        return _RISK_RANK[self]
+
+
+# Declaration order is severity order
+_RISK_RANK = {level: i for i, level in enumerate(RiskLevel)}
+
+_RISK_EMOJI = {
+    RiskLevel.INFO: "ℹ️",
+    RiskLevel.LOW: "🟢",
+    RiskLevel.MEDIUM: "🟡",
+    RiskLevel.HIGH: "🟠",
+    RiskLevel.CRITICAL: "🔴",
+}
 
 
 @dataclass
@@ -87,16 +118,8 @@ class ExecutionPlan:
         ]
         
         for action in self.actions:
-            risk_emoji = {
-                RiskLevel.INFO: "ℹ️",
-                RiskLevel.LOW: "🟢",
-                RiskLevel.MEDIUM: "🟡",
-                RiskLevel.HIGH: "🟠",
-                RiskLevel.CRITICAL: "🔴",
-            }
-            
             lines.append(
-                f"{action.id}. {risk_emoji.get(action.risk_level, '⚪')} "
+                f"{action.id}. {_RISK_EMOJI.get(action.risk_level, '⚪')} "
                 f"**{action.description}**"
             )
             lines.append(f"   - Device: `{action.device_ip}`")
@@ -154,6 +177,27 @@ class CommandClassifier:
         r"(rm|del|delete)\s+-rf?\s+/",
     ]
     
+    # Each list above compiled once into a single alternation
+    _COMPILED_RISK = {
+        level: re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+        for level, patterns in RISK_PATTERNS.items()
+    }
+    _COMPILED_BLOCKED = re.compile(
+        "|".join(f"(?:{p})" for p in ALWAYS_BLOCKED), re.IGNORECASE
+    )
+    
+    # Reversible toggles handled by get_rollback_command
+    _ROLLBACK_RE = re.compile(
+        r"\b(?:no\s+)?shutdown\b|/interface\s+(?:disable|enable)\b", re.IGNORECASE
+    )
+    
+    # Highest risk first; with hyperscan the index is the pattern id
+    _RISK_ORDER = (RiskLevel.CRITICAL, RiskLevel.HIGH, RiskLevel.MEDIUM, RiskLevel.LOW)
+    
+    # Set below when hyperscan is installed: every pattern scanned in one pass
+    _HS_RISK: Optional["_PatternSet"] = None
+    _HS_BLOCKED: Optional["_PatternSet"] = None
+    
     @classmethod
     def classify(cls, command: str) -> RiskLevel:
         """
@@ -165,14 +209,18 @@ class CommandClassifier:
         Returns:
             RiskLevel enum
         """
-        command_lower = command.lower().strip()
+        return _cached_classify(command.strip())
+    
+    @classmethod
+    def _classify(cls, command: str) -> RiskLevel:
+        if cls._HS_RISK is not None:
+            hits = cls._HS_RISK.matches(command)
+            return cls._RISK_ORDER[min(hits)] if hits else RiskLevel.INFO
         
         # Check from highest to lowest risk
-        for risk_level in [RiskLevel.CRITICAL, RiskLevel.HIGH, RiskLevel.MEDIUM, RiskLevel.LOW]:
-            patterns = cls.RISK_PATTERNS.get(risk_level, [])
-            for pattern in patterns:
-                if re.search(pattern, command_lower, re.IGNORECASE):
-                    return risk_level
+        for risk_level in cls._RISK_ORDER:
+            if cls._COMPILED_RISK[risk_level].search(command):
+                return risk_level
         
         return RiskLevel.INFO
     
@@ -184,13 +232,24 @@ class CommandClassifier:
         Returns:
             (is_blocked, reason)
         """
-        command_lower = command.lower()
+        return _cached_is_blocked(command)
+    
+    @classmethod
+    def _is_blocked(cls, command: str) -> tuple[bool, str]:
+        if cls._HS_BLOCKED is not None:
+            hits = cls._HS_BLOCKED.matches(command)
+            if not hits:
+                return False, ""
+            return True, f"Command matches blocked pattern: {cls.ALWAYS_BLOCKED[min(hits)]}"
+        
+        if not cls._COMPILED_BLOCKED.search(command):
+            return False, ""
         
+        # Rare path - find which pattern matched for the reason
         for pattern in cls.ALWAYS_BLOCKED:
-            if re.search(pattern, command_lower, re.IGNORECASE):
+            if re.search(pattern, command, re.IGNORECASE):
                 return True, f"Command matches blocked pattern: {pattern}"
-        
-        return False, ""
+        return True, "Command matches a blocked pattern"
     
     @classmethod
     def is_read_only(cls, command: str) -> bool:
@@ -203,24 +262,73 @@ class CommandClassifier:
         """
         Generate rollback command for reversible operations
         """
-        command_lower = command.lower()
-        
-        # Interface shutdown -> no shutdown
-        if "shutdown" in command_lower and "no shutdown" not in command_lower:
-            return command.replace("shutdown", "no shutdown")
-        
-        # no shutdown -> shutdown  
-        if "no shutdown" in command_lower:
-            return command.replace("no shutdown", "shutdown")
+        # One pass: first shutdown / no shutdown / (Mikrotik) /interface
+        # disable|enable toggle is inverted; anything else has no rollback
+        rollback, count = cls._ROLLBACK_RE.subn(_invert_toggle, command, count=1)
+        return rollback if count else None
+
+
+class _PatternSet:
+    """Hyperscan block-mode database matching many regexes in one pass over the input"""
+    
+    def __init__(self, patterns: List[str], ids: List[int]):
+        self._db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        self._db.compile(
+            expressions=[p.encode() for p in patterns],
+            ids=ids,
+            elements=len(patterns),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(patterns)
+        )
+        self._local = threading.local()  # scratch space can't be shared between threads
+    
+    def matches(self, text: str) -> Set[int]:
+        """Ids of all patterns found in text"""
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            scratch = self._local.scratch = hyperscan.Scratch(self._db)
         
-        # Interface disable -> enable (Mikrotik)
-        if "/interface disable" in command_lower:
-            return command.replace("disable", "enable")
+        hits: Set[int] = set()
         
-        if "/interface enable" in command_lower:
-            return command.replace("enable", "disable")
+        def on_match(pattern_id, start, end, flags, context):
+            hits.add(pattern_id)
         
-        return None
+        self._db.scan(text.encode(), match_event_handler=on_match, scratch=scratch)
+        return hits
+
+
+if HYPERSCAN_AVAILABLE:
+    try:
+        _risk = [
+            (pattern, rank)
+            for rank, level in enumerate(CommandClassifier._RISK_ORDER)
+            for pattern in CommandClassifier.RISK_PATTERNS[level]
+        ]
+        CommandClassifier._HS_RISK = _PatternSet([p for p, _ in _risk], [r for _, r in _risk])
+        CommandClassifier._HS_BLOCKED = _PatternSet(
+            CommandClassifier.ALWAYS_BLOCKED, list(range(len(CommandClassifier.ALWAYS_BLOCKED)))
+        )
+    except Exception as e:
+        print(f"hyperscan unavailable, using re for command classification: {e}")
+        CommandClassifier._HS_RISK = CommandClassifier._HS_BLOCKED = None
+
+
+def _invert_toggle(match: re.Match) -> str:
+    """Opposite of a matched shutdown/no shutdown or /interface disable/enable"""
+    text = match.group(0).lower()
+    if text.startswith("/interface"):
+        return "/interface enable" if text.endswith("disable") else "/interface disable"
+    return "shutdown" if text.startswith("no") else "no shutdown"
+
+
+# Classification is pure and agents repeat the same commands a lot
+@lru_cache(maxsize=4096)
+def _cached_classify(command: str) -> RiskLevel:
+    return CommandClassifier._classify(command)
+
+
+@lru_cache(maxsize=4096)
+def _cached_is_blocked(command: str) -> tuple[bool, str]:
+    return CommandClassifier._is_blocked(command)
 
 
 class GuardrailsModule:
@@ -243,8 +351,9 @@ class GuardrailsModule:
         self.max_iterations = max_iterations
         self.auto_approve_below = auto_approve_below
         self.approval_callback = approval_callback
-        self.pending_plans: Dict[str, ExecutionPlan] = {}
-        self.iteration_counts: Dict[str, int] = {}
+        # Insertion-ordered so the oldest plan / least recent session evicts first
+        self.pending_plans: "OrderedDict[str, ExecutionPlan]" = OrderedDict()
+        self.iteration_counts: "OrderedDict[str, int]" = OrderedDict()
         self._plan_counter = 0
     
     def check_iteration_limit(self, session_id: str) -> tuple[bool, int]:
@@ -260,11 +369,14 @@ class GuardrailsModule:
     def increment_iteration(self, session_id: str) -> int:
         """Increment and return new iteration count"""
         self.iteration_counts[session_id] = self.iteration_counts.get(session_id, 0) + 1
+        self.iteration_counts.move_to_end(session_id)
+        while len(self.iteration_counts) > MAX_TRACKED_SESSIONS:
+            self.iteration_counts.popitem(last=False)
         return self.iteration_counts[session_id]
     
     def reset_iterations(self, session_id: str):
         """Reset iteration count for session"""
-        self.iteration_counts[session_id] = 0
+        self.iteration_counts.pop(session_id, None)  # absent counts as 0
     
     def assess_risk(self, actions: List[Dict[str, str]]) -> RiskLevel:
         """
@@ -276,16 +388,11 @@ class GuardrailsModule:
         Returns:
             Highest risk level among all actions
         """
-        highest_risk = RiskLevel.INFO
-        
-        for action in actions:
-            cmd = action.get("command", "")
-            risk = CommandClassifier.classify(cmd)
-            
-            if risk.value > highest_risk.value:  # Compare enum values
-                highest_risk = risk
-        
-        return highest_risk
+        return max(
+            (CommandClassifier.classify(action.get("command", "")) for action in actions),
+            key=lambda risk: risk.rank,
+            default=RiskLevel.INFO
+        )
     
     def create_execution_plan(
         self, 
@@ -303,7 +410,7 @@ class GuardrailsModule:
             ExecutionPlan object
         """
         self._plan_counter += 1
-        plan_id = f"plan_{self._plan_counter}_{int(datetime.now().timestamp())}"
+        plan_id = f"plan_{self._plan_counter}_{time.monotonic_ns():x}"
         
         planned_actions = []
         max_risk = RiskLevel.INFO
@@ -314,7 +421,7 @@ class GuardrailsModule:
             description = action.get("description", command)
             
             risk = CommandClassifier.classify(command)
-            if risk.value > max_risk.value:
+            if risk.rank > max_risk.rank:
                 max_risk = risk
             
             planned_actions.append(PlannedAction(
@@ -335,18 +442,13 @@ class GuardrailsModule:
         )
         
         # Store for later approval
-        self.pending_plans[plan_id] = plan
+        self._store_plan(plan)
         
         return plan
     
     def requires_approval(self, plan: ExecutionPlan) -> bool:
         """Check if plan requires human approval"""
-        # Compare risk level using value comparison
-        risk_order = [RiskLevel.INFO, RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL]
-        plan_index = risk_order.index(plan.overall_risk)
-        threshold_index = risk_order.index(self.auto_approve_below)
-        
-        return plan_index > threshold_index
+        return plan.overall_risk.rank > self.auto_approve_below.rank
     
     async def request_approval(self, plan: ExecutionPlan) -> bool:
         """
@@ -358,9 +460,33 @@ class GuardrailsModule:
             return await self.approval_callback(plan)
         
         # Default: store and wait for external approval
-        self.pending_plans[plan.id] = plan
+        self._store_plan(plan)
         return False  # Not auto-approved
     
+    def _store_plan(self, plan: ExecutionPlan):
+        """Keep a plan for approval, evicting expired plans and any over the cap"""
+        self.pending_plans[plan.id] = plan
+        
+        cutoff = self._plan_cutoff()
+        while self.pending_plans:
+            oldest = next(iter(self.pending_plans.values()))
+            if oldest.created_at >= cutoff and len(self.pending_plans) <= MAX_PENDING_PLANS:
+                break
+            self.pending_plans.popitem(last=False)
+    
+    @staticmethod
+    def _plan_cutoff() -> str:
+        """created_at timestamps older than this have outlived PENDING_PLAN_TTL"""
+        return (datetime.now() - timedelta(seconds=PENDING_PLAN_TTL)).isoformat()
+    
+    def _live_plan(self, plan_id: str) -> Optional[ExecutionPlan]:
+        """Look up a pending plan, dropping it if it has expired"""
+        plan = self.pending_plans.get(plan_id)
+        if plan is not None and plan.created_at < self._plan_cutoff():
+            del self.pending_plans[plan_id]
+            return None
+        return plan
+    
     def approve_plan(self, plan_id: str, approved_by: str = "user") -> bool:
         """
         Approve a pending execution plan
@@ -370,12 +496,12 @@ class GuardrailsModule:
             approved_by: Who approved
             
         Returns:
-            True if plan was found and approved
+            True if plan was found and approved (expired plans are not)
         """
-        if plan_id not in self.pending_plans:
+        plan = self._live_plan(plan_id)
+        if plan is None:
             return False
         
-        plan = self.pending_plans[plan_id]
         plan.approved = True
         plan.approved_by = approved_by
         plan.approval_time = datetime.now().isoformat()
@@ -393,10 +519,13 @@ class GuardrailsModule:
     
     def get_pending_plan(self, plan_id: str) -> Optional[ExecutionPlan]:
         """Get a pending plan by ID"""
-        return self.pending_plans.get(plan_id)
+        return self._live_plan(plan_id)
     
     def list_pending_plans(self) -> List[ExecutionPlan]:
-        """List all pending plans"""
+        """List all pending plans that have not expired"""
+        cutoff = self._plan_cutoff()
+        for plan_id in [p.id for p in self.pending_plans.values() if p.created_at < cutoff]:
+            del self.pending_plans[plan_id]
         return list(self.pending_plans.values())
     
     def validate_command(self, command: str) -> tuple[bool, str, RiskLevel]:
@@ -9,11 +9,9 @@ Source of Truth for network device information with:
 """
 import os
 import sqlite3
-import asyncio
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
 from enum import Enum
-from datetime import datetime
 from pathlib import Path
 
 try:
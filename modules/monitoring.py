@@ -8,16 +8,17 @@ Features:
 - Performance bottleneck identification
 - Predictive failure analysis
 """
+from collections import defaultdict, deque
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+from itertools import islice
+from typing import List, Dict, Any, Optional, Deque
 from datetime import datetime, timedelta
 from enum import Enum
-import asyncio
+import queue
 import threading
 import time
 import os
 import sqlite3
-from pathlib import Path
 
 try:
     import psutil
@@ -162,6 +163,19 @@ class SystemMetrics:
         }
 
 
+_SQL_INSERT_METRIC = """
+    INSERT INTO metrics_raw (metric_name, value, unit, labels, timestamp)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+_SQL_INSERT_INTERFACE_METRIC = """
+    INSERT INTO interface_metrics
+    (interface_name, bytes_sent, bytes_recv, packets_sent, packets_recv,
+     errors_in, errors_out, drops_in, drops_out, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 class MonitoringModule:
     """
     Monitoring and Observability Module
@@ -175,8 +189,14 @@ class MonitoringModule:
     - Distinguish signal from noise
     """
     
+    WRITE_BATCH_SECONDS = 0.05
+    WRITE_BATCH_MAX = 500
+    
     def __init__(self):
-        self.metrics_history: List[MetricPoint] = []
+        # Last 1000 metrics overall, plus the same points indexed by name so
+        # trend/anomaly checks don't rescan the whole history
+        self.metrics_history: Deque[MetricPoint] = deque()
+        self._metrics_by_name: Dict[str, Deque[MetricPoint]] = defaultdict(deque)
         self.alerts: List[Alert] = []
         self.thresholds: Dict[str, Dict[str, float]] = {
             "cpu_usage": {"warning": 70, "critical": 90},
@@ -195,6 +215,12 @@ class MonitoringModule:
         self._prev_disk_io: Optional[Any] = None
         self._init_database()
         
+        # Metric rows are written by a background thread that batches
+        # everything queued within WRITE_BATCH_SECONDS into one transaction
+        self._write_q: "queue.Queue[tuple]" = queue.Queue()
+        self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
+        
     def update_network_metrics(self, latency=None, bandwidth=None):
         """Update cached network metrics"""
         if latency is not None:
@@ -487,11 +513,14 @@ class MonitoringModule:
         """
         Ingest a metric and check for threshold violations
         """
-        self.metrics_history.append(metric)
+        # Keep only last 1000 metrics to prevent memory bloat; the evicted
+        # point is also the oldest of its name
+        if len(self.metrics_history) >= 1000:
+            evicted = self.metrics_history.popleft()
+            self._metrics_by_name[evicted.name].popleft()
         
-        # Keep only last 1000 metrics to prevent memory bloat
-        if len(self.metrics_history) > 1000:
-            self.metrics_history = self.metrics_history[-1000:]
+        self.metrics_history.append(metric)
+        self._metrics_by_name[metric.name].append(metric)
         
         # Check thresholds
         if metric.name in self.thresholds:
@@ -519,6 +548,11 @@ class MonitoringModule:
         
         return None
     
+    def _recent_metrics(self, metric_name: str, count: int) -> List[MetricPoint]:
+        """Last `count` points of one metric, oldest first"""
+        points = self._metrics_by_name.get(metric_name, ())
+        return list(islice(points, max(len(points) - count, 0), None))
+    
     def analyze_trend(self, metric_name: str, window_size: int = 10) -> Dict[str, Any]:
         """
         Analyze trend for a specific metric
@@ -526,8 +560,7 @@ class MonitoringModule:
         Returns:
             Dict with trend analysis (direction, rate of change, prediction)
         """
-        # Filter metrics by name
-        relevant = [m for m in self.metrics_history if m.name == metric_name][-window_size:]
+        relevant = self._recent_metrics(metric_name, window_size)
         
         if len(relevant) < 2:
             return {"status": "insufficient_data", "message": "Need more data points"}
@@ -562,7 +595,7 @@ class MonitoringModule:
         
         Uses z-score based detection
         """
-        relevant = [m for m in self.metrics_history if m.name == metric.name][-50:]
+        relevant = self._recent_metrics(metric.name, 50)
         
         if len(relevant) < 10:
             return None  # Not enough data
@@ -658,76 +691,76 @@ class MonitoringModule:
         return output
     
     def _store_metrics_to_db(self, metrics: SystemMetrics):
-        """Store system metrics to database"""
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            now = datetime.now().isoformat()
-            
-            # Store key metrics
-            cursor.execute("INSERT INTO metrics_raw (metric_name, value, unit, timestamp) VALUES (?, ?, ?, ?)",
-                         ("cpu_usage", metrics.cpu_percent, "%", now))
-            cursor.execute("INSERT INTO metrics_raw (metric_name, value, unit, timestamp) VALUES (?, ?, ?, ?)",
-                         ("memory_usage", metrics.memory_percent, "%", now))
-            cursor.execute("INSERT INTO metrics_raw (metric_name, value, unit, timestamp) VALUES (?, ?, ?, ?)",
-                         ("disk_usage", metrics.disk_percent, "%", now))
-            cursor.execute("INSERT INTO metrics_raw (metric_name, value, unit, timestamp) VALUES (?, ?, ?, ?)",
-                         ("disk_read_mb", metrics.disk_read_mb, "MB", now))
-            cursor.execute("INSERT INTO metrics_raw (metric_name, value, unit, timestamp) VALUES (?, ?, ?, ?)",
-                         ("disk_write_mb", metrics.disk_write_mb, "MB", now))
-            
-            # Store per-core CPU
-            for i, core_pct in enumerate(metrics.cpu_per_core):
-                cursor.execute("INSERT INTO metrics_raw (metric_name, value, unit, labels, timestamp) VALUES (?, ?, ?, ?, ?)",
-                             ("cpu_core_usage", core_pct, "%", f'{{"core":{i}}}', now))
-            
-            conn.commit()
-            conn.close()
-            
-            # Cleanup old data (keep only last 24 hours for raw data)
-            self._cleanup_old_metrics()
-        except Exception as e:
-            print(f"Warning: Could not store metrics to database: {e}")
+        """Queue system metrics for the database writer"""
+        now = datetime.now().isoformat()
+        
+        # Store key metrics
+        rows = [
+            ("cpu_usage", metrics.cpu_percent, "%", None, now),
+            ("memory_usage", metrics.memory_percent, "%", None, now),
+            ("disk_usage", metrics.disk_percent, "%", None, now),
+            ("disk_read_mb", metrics.disk_read_mb, "MB", None, now),
+            ("disk_write_mb", metrics.disk_write_mb, "MB", None, now),
+        ]
+        
+        # Store per-core CPU
+        rows.extend(
+            ("cpu_core_usage", core_pct, "%", f'{{"core":{i}}}', now)
+            for i, core_pct in enumerate(metrics.cpu_per_core)
+        )
+        
+        self._write_q.put((_SQL_INSERT_METRIC, rows))
+        
+        # Cleanup old data (keep only last 24 hours for raw data)
+        self._cleanup_old_metrics()
     
     def _store_interface_metrics(self, iface: InterfaceMetrics):
-        """Store interface metrics to database"""
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO interface_metrics 
-                (interface_name, bytes_sent, bytes_recv, packets_sent, packets_recv,
-                 errors_in, errors_out, drops_in, drops_out, timestamp) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (iface.name, iface.bytes_sent, iface.bytes_recv, iface.packets_sent,
-                  iface.packets_recv, iface.errin, iface.errout, iface.dropin,
-                  iface.dropout, iface.timestamp.isoformat()))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Warning: Could not store interface metrics: {e}")
+        """Queue interface metrics for the database writer"""
+        self._write_q.put((_SQL_INSERT_INTERFACE_METRIC, [(
+            iface.name, iface.bytes_sent, iface.bytes_recv, iface.packets_sent,
+            iface.packets_recv, iface.errin, iface.errout, iface.dropin,
+            iface.dropout, iface.timestamp.isoformat()
+        )]))
     
     def _cleanup_old_metrics(self):
-        """Delete metrics older than retention window"""
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Delete raw metrics older than 24 hours
-            cutoff = (datetime.now() - timedelta(hours=24)).isoformat()
-            cursor.execute("DELETE FROM metrics_raw WHERE timestamp < ?", (cutoff,))
-            
-            # Delete interface metrics older than 24 hours
-            cursor.execute("DELETE FROM interface_metrics WHERE timestamp < ?", (cutoff,))
-            
-            # Delete aggregated metrics older than 30 days
-            cutoff_30d = (datetime.now() - timedelta(days=30)).isoformat()
-            cursor.execute("DELETE FROM metrics_5min WHERE timestamp < ?", (cutoff_30d,))
+        """Queue deletion of metrics older than retention window"""
+        # Delete raw and interface metrics older than 24 hours
+        cutoff = (datetime.now() - timedelta(hours=24)).isoformat()
+        self._write_q.put(("DELETE FROM metrics_raw WHERE timestamp < ?", [(cutoff,)]))
+        self._write_q.put(("DELETE FROM interface_metrics WHERE timestamp < ?", [(cutoff,)]))
+        
+        # Delete aggregated metrics older than 30 days
+        cutoff_30d = (datetime.now() - timedelta(days=30)).isoformat()
+        self._write_q.put(("DELETE FROM metrics_5min WHERE timestamp < ?", [(cutoff_30d,)]))
+    
+    def _writer_loop(self):
+        """Drain queued writes in batches, one transaction per batch"""
+        conn = self._get_connection()
+        while True:
+            batch = [self._write_q.get()]
+            deadline = time.monotonic() + self.WRITE_BATCH_SECONDS
+            while len(batch) < self.WRITE_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._write_q.get(timeout=remaining))
+                except queue.Empty:
+                    break
             
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Warning: Could not cleanup old metrics: {e}")
+            try:
+                with conn:
+                    for sql, rows in batch:
+                        conn.executemany(sql, rows)
+            except Exception as e:
+                print(f"Warning: Could not store metrics to database: {e}")
+            finally:
+                for _ in batch:
+                    self._write_q.task_done()
+    
+    def flush(self):
+        """Block until all queued metric writes are committed"""
+        self._write_q.join()
     
     def get_metric_history(self, metric_name: str, hours: int = 1) -> List[Dict[str, Any]]:
         """Get historical data for a specific metric"""
@@ -6,9 +6,13 @@ Provides tools for network diagnostics that the agent can use.
 import subprocess
 import platform
 import socket
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
+# Ports probed at once by port_scan (each probe blocks a worker for up to 1s)
+PORT_SCAN_WORKERS = 16
+
 
 @dataclass
 class ToolResult:
@@ -136,23 +140,29 @@ class NetworkTools:
         if ports is None:
             ports = [21, 22, 23, 25, 53, 80, 110, 143, 443, 445, 993, 995, 3306, 3389, 5432, 8080]
         
+        def probe(port: int) -> Optional[bool]:
+            try:
+                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                    sock.settimeout(1)
+                    return sock.connect_ex((host, port)) == 0
+            except:
+                return None
+        
+        # Probe all ports concurrently - a scan takes ~1 timeout, not one per closed port
+        with ThreadPoolExecutor(max_workers=min(PORT_SCAN_WORKERS, len(ports)) or 1) as pool:
+            outcomes = list(pool.map(probe, ports))
+        
         results = []
         open_ports = []
         
-        for port in ports:
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(1)
-                result = sock.connect_ex((host, port))
-                sock.close()
-                
-                if result == 0:
-                    open_ports.append(port)
-                    results.append(f"  [{port}] OPEN")
-                else:
-                    results.append(f"  [{port}] closed")
-            except:
+        for port, is_open in zip(ports, outcomes):
+            if is_open is None:
                 results.append(f"  [{port}] error")
+            elif is_open:
+                open_ports.append(port)
+                results.append(f"  [{port}] OPEN")
+            else:
+                results.append(f"  [{port}] closed")
         
         output = f"Port Scan Results for {host}:\n" + "\n".join(results)
         output += f"\n\nOpen ports: {open_ports}"
@@ -34,6 +34,9 @@ from web.routes import devices as device_routes
 from web.routes import guardrails as guardrails_routes
 from web.routes import log_watch as logwatch_routes
 
+# Strong refs for fire-and-forget startup tasks; the loop only keeps weak ones
+_background_tasks = set()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -48,6 +51,10 @@ async def lifespan(app: FastAPI):
     
     if health_cache["ollama_connected"]:
         print(f"✅ Connected to Ollama with model: {config.OLLAMA_MODEL}")
+        from agent.langgraph_agent import warm_up_prompt_cache
+        warm_up_task = asyncio.create_task(warm_up_prompt_cache())
+        _background_tasks.add(warm_up_task)
+        warm_up_task.add_done_callback(_background_tasks.discard)
     else:
         print(f"⚠️ Ollama not available at startup")
     
@@ -68,6 +75,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     monitoring.stop_collection()
+    for task in list(_background_tasks):
+        task.cancel()
     health_task.cancel()
     network_task.cancel()
     metrics_task.cancel()
@@ -17,6 +17,25 @@ from modules.monitoring import monitoring
 router = APIRouter()
 
 
+async def _ensure_messages_table(db):
+    """Create the chat history table and its indexes if missing"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            thread_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Per-thread loads/deletes and the thread listing's MIN/MAX(timestamp)
+    # become index seeks instead of full table scans
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_messages_thread_ts
+        ON messages(thread_id, timestamp)
+    """)
+
+
 # --- Request/Response Models ---
 
 class QueryRequest(BaseModel):
@@ -126,9 +145,9 @@ async def stream_agent(websocket: WebSocket):
                 "status": "starting"
             })
             
-            full_response = ""
+            chunks = []
             async for chunk in langgraph_agent.astream(query, thread_id):
-                full_response += chunk
+                chunks.append(chunk)
                 await websocket.send_json({
                     "type": "chunk",
                     "content": chunk
@@ -136,7 +155,7 @@ async def stream_agent(websocket: WebSocket):
             
             await websocket.send_json({
                 "type": "complete",
-                "response": full_response,
+                "response": "".join(chunks),
                 "blocked": False,
                 "timing": {"mode": "langgraph_stream"}
             })
@@ -235,15 +254,7 @@ async def save_chat_message(request: SaveMessageRequest):
         os.makedirs("data", exist_ok=True)
         
         async with aiosqlite.connect("data/chat_history.db") as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    thread_id TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+            await _ensure_messages_table(db)
             await db.execute(
                 "INSERT INTO messages (thread_id, role, content) VALUES (?, ?, ?)",
                 (request.thread_id, request.role, request.content)
@@ -263,15 +274,7 @@ async def save_chat_history(request: SaveHistoryRequest):
         os.makedirs("data", exist_ok=True)
         
         async with aiosqlite.connect("data/chat_history.db") as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    thread_id TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+            await _ensure_messages_table(db)
             await db.execute("DELETE FROM messages WHERE thread_id = ?", (request.thread_id,))
             for msg in request.messages:
                 await db.execute(
@@ -4,11 +4,18 @@ Guardrails Routes
 Endpoints for human-in-the-loop action approval and risk assessment.
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List
 
 from modules.guardrails import guardrails, RiskLevel, ExecutionPlan
 
+try:
+    import orjson  # noqa: F401 - required by ORJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 router = APIRouter()
 
 
@@ -39,7 +46,9 @@ async def create_action_plan(request: ActionPlanRequest):
 async def list_pending_plans():
     """List all pending execution plans"""
     plans = guardrails.list_pending_plans()
-    return {"count": len(plans), "plans": [p.to_dict() for p in plans]}
+    body = {"count": len(plans), "plans": [p.to_dict() for p in plans]}
+    # to_dict() is already JSON-ready; orjson skips FastAPI's generic encoder walk
+    return ORJSONResponse(body) if ORJSON_AVAILABLE else body
 
 
 @router.post("/guardrails/approve/{plan_id}")
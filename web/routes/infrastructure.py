@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from typing import List
 import asyncio
 import json
+from itertools import islice
 
 from agent.infrastructure import infrastructure
 from agent.scheduler import scheduler
@@ -208,7 +209,7 @@ async def get_device_logs(device_id: str, limit: int = 50):
         raise HTTPException(status_code=404, detail="Device not found")
     
     logs = []
-    for check in reversed(device.health_history[-limit:]):
+    for check in islice(reversed(device.health_history), limit):
         # Main status line
         logs.append({
             "time": check.timestamp,
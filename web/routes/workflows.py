@@ -177,9 +177,9 @@ async def stream_workflow(websocket: WebSocket):
             
             await websocket.send_json({"type": "status", "phase": "processing"})
             
-            full_response = ""
+            chunks = []
             async for chunk in network_agent.astream(goal, thread_id):
-                full_response += chunk
+                chunks.append(chunk)
                 await websocket.send_json({
                     "type": "chunk",
                     "content": chunk
@@ -187,7 +187,7 @@ async def stream_workflow(websocket: WebSocket):
             
             await websocket.send_json({
                 "type": "complete",
-                "response": full_response,
+                "response": "".join(chunks),
                 "timing": {"mode": "langgraph_stream"}
             })
     except WebSocketDisconnect:
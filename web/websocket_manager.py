@@ -12,6 +12,19 @@ import asyncio
 import json
 from datetime import datetime
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _encode(message: dict) -> str:
+    """Serialize a message once for all recipients (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
 
 class ConnectionManager:
     """
@@ -55,11 +68,16 @@ class ConnectionManager:
         
         # Create a copy to avoid modification during iteration
         connections = list(self.connections[channel])
+        if not connections:
+            return
         disconnected = []
         
+        # Encode once instead of per client (send_json re-serializes each time)
+        payload = _encode(message)
+        
         for websocket in connections:
             try:
-                await websocket.send_json(message)
+                await websocket.send_text(payload)
             except Exception:
                 # Client disconnected
                 disconnected.append(websocket)